@@ -0,0 +1,209 @@
+"""Servidor HTTP local que imita as páginas do VivaReal usadas pelo scraper.
+
+Serve a home, páginas de busca com cards ``li[data-cy="rp-property-cd"]`` e
+páginas de anúncio com os mesmos seletores e JSON-LD do site, geradas de forma
+determinística a partir do ID (mesmo conteúdo em toda execução). Uso::
+
+    python -m benchmarks.mock_server --porta 8765 --latencia 0.05
+"""
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from viva_real.utils.listing_index import extract_listing_id
+
+FIRST_ID = 2700000000
+BAIRROS = ["Pinheiros", "Itaim Bibi", "Moema", "Jardim Paulista", "Vila Mariana", "Perdizes"]
+RUAS = ["Rua dos Pinheiros", "Avenida Brigadeiro Faria Lima", "Rua Joaquim Floriano", "Alameda Santos", "Rua Domingos de Morais"]
+AMENIDADES = ["Piscina", "Academia", "Churrasqueira", "Portaria 24h", "Salão de festas", "Playground", "Varanda gourmet"]
+
+COOKIE_BANNER = '<div id="cookie-notifier"><button id="cookie-notifier-cta">Aceitar</button></div>'
+
+
+def _page(title: str, body: str) -> bytes:
+    return f'<!DOCTYPE html><html lang="pt-BR"><head><meta charset="utf-8"><title>{title}</title></head><body>{COOKIE_BANNER}{body}</body></html>'.encode("utf-8")
+
+
+class MockVivaReal:
+    """Gera as páginas; ``per_page`` cards por página de busca e ``total_pages`` páginas com resultados."""
+
+    def __init__(self, per_page: int = 30, total_pages: int = 10, padding_kb: int = 150, seed: int = 42):
+        self.per_page = per_page
+        self.total_pages = total_pages
+        self.padding = "x" * (padding_kb * 1024) # Simula o peso do HTML real (scripts, estado da página)
+        self.seed = seed
+
+    def listing_path(self, listing_id: int) -> str:
+        rng = random.Random(self.seed + listing_id)
+        quartos = rng.randint(1, 4)
+        bairro = rng.choice(BAIRROS).lower().replace(" ", "-")
+        return f"/imovel/apartamento-{quartos}-quartos-{bairro}-zona-oeste-sao-paulo-com-garagem-{rng.randint(40, 300)}m2-venda-RS{rng.randint(4, 40)}00000-id-{listing_id}/"
+
+    def listing_ids(self, page: int) -> List[int]:
+        if page < 1 or page > self.total_pages:
+            return []
+        start = FIRST_ID + (page - 1) * self.per_page
+        return list(range(start, start + self.per_page))
+
+    def home(self) -> bytes:
+        return _page("VivaReal (mock)", "<main><h1>Imóveis à venda</h1></main>")
+
+    def search(self, page: int) -> bytes:
+        cards = []
+        for listing_id in self.listing_ids(page):
+            rng = random.Random(self.seed + listing_id)
+            cards.append(
+                f'<li data-cy="rp-property-cd"><a href="{self.listing_path(listing_id)}">'
+                f'<p data-cy="rp-cardProperty-price-txt">R$ {rng.randint(400, 4000) * 1000:,}</p>'.replace(",", ".") +
+                f'<p data-cy="rp-cardProperty-propertyArea-txt">{rng.randint(40, 300)} m²</p>'
+                f'<p data-cy="rp-cardProperty-bedroomQuantity-txt">{rng.randint(1, 4)} quartos</p></a></li>'
+            )
+        total = f"{self.per_page * self.total_pages:,}".replace(",", ".")
+        title = f'<h1 data-cy="rp-title">{total} Imóveis à venda em São Paulo</h1>'
+        return _page(f"Busca página {page}", f'{title}<ul>{"".join(cards)}</ul><script>var estado = "{self.padding}";</script>')
+
+    def listing(self, listing_id: int, host: str) -> bytes:
+        rng = random.Random(self.seed + listing_id)
+        bairro = rng.choice(BAIRROS)
+        rua = rng.choice(RUAS)
+        preco = rng.randint(400, 4000) * 1000
+        amenities = "".join(f'<li class="amenities-item-text">{a}</li>' for a in [
+            f"{rng.randint(40, 300)} m²", f"{rng.randint(1, 4)} quartos", f"{rng.randint(1, 3)} banheiros",
+            f"{rng.randint(0, 3)} vagas", *rng.sample(AMENIDADES, 3),
+        ])
+        imgs = "".join(f'<img src="http://{host}/img/vivareal-{listing_id}-{i}.jpg">' for i in range(8))
+        ld = {
+            "@context": "https://schema.org", "@type": "Product",
+            "offers": {"@type": "Offer", "price": preco},
+            "address": {"@type": "PostalAddress", "streetAddress": f"{rua}, {rng.randint(1, 3000)}", "addressLocality": f"{bairro}, São Paulo", "addressRegion": "SP"},
+            "geo": {"latitude": -23.5 - rng.random() / 10, "longitude": -46.6 - rng.random() / 10},
+        }
+        body = (
+            f'<a data-testid="official-store-redirect-link">Imobiliária {listing_id % 97}</a>'
+            f'<div class="price-info__values-sale"><span class="value-item__value">R$ {preco:,}</span></div>'.replace(",", ".") +
+            f'<p data-testid="location-address">{rua}, {rng.randint(1, 3000)} - {bairro}, São Paulo - SP</p>'
+            f'<span data-testid="condoFee">R$ {rng.randint(3, 30) * 100}</span><span data-testid="iptu">R$ {rng.randint(1, 20) * 100}</span>'
+            f'<ul>{amenities}</ul>{imgs}'
+            f'<script type="application/ld+json">{json.dumps(ld, ensure_ascii=False)}</script>'
+            f'<script>var estado = "{self.padding}";</script>'
+        )
+        return _page(f"Anúncio {listing_id}", body)
+
+
+class MockServer:
+    """``ThreadingHTTPServer`` em segundo plano servindo um ``MockVivaReal``.
+
+    ``latency`` atrasa cada resposta HTML (s); ``block_every`` responde 429 a
+    cada N anúncios, para exercitar a fila de novas tentativas.
+    """
+
+    def __init__(self, site: Optional[MockVivaReal] = None, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0, block_every: int = 0):
+        self.site = site or MockVivaReal()
+        self.latency = latency
+        self.block_every = block_every
+        self.requests = 0
+        self.listings = 0
+        self.bytes_sent = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def search_url(self) -> str:
+        return f"{self.url}/venda/sp/sao-paulo/bench/?transacao=venda"
+
+    def listing_urls(self, count: int) -> List[str]:
+        ids = range(FIRST_ID, FIRST_ID + count)
+        return [f"{self.url}{self.site.listing_path(i)}" for i in ids]
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def _send(self, status: int, body: bytes, content_type: str = "text/html; charset=utf-8") -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                with server._lock:
+                    server.bytes_sent += len(body)
+
+            def do_GET(self) -> None:
+                with server._lock:
+                    server.requests += 1
+                parts = urlsplit(self.path)
+                host = self.headers.get("Host", "127.0.0.1")
+                if parts.path.startswith("/img/"):
+                    self._send(200, b"\xff\xd8\xff" + b"\0" * 2048, "image/jpeg")
+                    return
+                if server.latency:
+                    time.sleep(server.latency)
+                if parts.path == "/":
+                    self._send(200, server.site.home())
+                elif parts.path.startswith("/venda/"):
+                    page = int(parse_qs(parts.query).get("page", ["1"])[0])
+                    self._send(200, server.site.search(page))
+                elif parts.path.startswith("/imovel/"):
+                    with server._lock:
+                        server.listings += 1
+                        n = server.listings
+                    if server.block_every and n % server.block_every == 0:
+                        self._send(429, _page("Access denied", "<h1>Access denied</h1>"))
+                        return
+                    listing_id = extract_listing_id(parts.path)
+                    if listing_id is None:
+                        self._send(404, _page("Não encontrado", "<h1>Página não encontrada</h1>"))
+                    else:
+                        self._send(200, server.site.listing(int(listing_id), host))
+                else:
+                    self._send(404, _page("Não encontrado", "<h1>Página não encontrada</h1>"))
+
+        return Handler
+
+    def start(self) -> "MockServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self) -> "MockServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Servidor local com páginas sintéticas do VivaReal")
+    parser.add_argument("--porta", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso (s) de cada página HTML")
+    parser.add_argument("--paginas", type=int, default=10, help="Páginas de busca com resultados")
+    parser.add_argument("--bloquear-cada", type=int, default=0, help="Responde 429 a cada N anúncios")
+    args = parser.parse_args()
+    with MockServer(MockVivaReal(total_pages=args.paginas), port=args.porta, latency=args.latencia, block_every=args.bloquear_cada) as srv:
+        print(f"Mock em {srv.search_url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
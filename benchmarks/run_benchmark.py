@@ -0,0 +1,210 @@
+"""Benchmark offline: captura de links e extração contra o ``MockServer`` local.
+
+Roda ``VivaRealLinkScraper.scrape_links`` e ``VivaRealScraper.scrape_batch``
+sem rede e sem pausas (``AdaptiveRateController.disabled()``), para cada
+combinação de engine e número de workers, e mede páginas/s, p50/p95 por
+página (via ``RunMetrics``), memória do processo + Chromium e CPU. Uso::
+
+    python -m benchmarks.run_benchmark --engines browser,http --workers 1,4 --anuncios 120
+    python -m benchmarks.run_benchmark --saida atual.json --comparar base.json --tolerancia 0.2
+
+Com ``--comparar``, sai com código 1 se alguma configuração ficou mais lenta
+que a base além da tolerância (uso em CI).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.mock_server import MockServer, MockVivaReal
+from viva_real.captura_links_async import VivaRealLinkScraper
+from viva_real.scraper_async import VivaRealScraper
+from viva_real.utils.memory_guard import proc_tree, proc_usage
+from viva_real.utils.metrics import RunMetrics
+from viva_real.utils.rate_controller import AdaptiveRateController
+from viva_real.utils.resource_blocker import ResourceBlocker
+
+logger = logging.getLogger(__name__)
+
+
+class ResourceSampler:
+    """Amostra em segundo plano a RSS e a CPU do processo e de todos os descendentes.
+
+    Processos que terminam durante a medição (contextos, renderers) mantêm a
+    última CPU vista. Sem /proc (macOS/Windows), usa só ``resource``/``os.times``
+    do próprio processo.
+    """
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.has_proc = os.path.isdir("/proc")
+        self.peak_rss = 0
+        self.baseline_rss = 0
+        self._cpu: Dict[int, float] = {}
+        self._cpu_start = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _sample(self) -> tuple:
+        if not self.has_proc:
+            import resource
+            t = os.times()
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024, t.user + t.system
+        rss = 0
+        for pid in proc_tree(os.getpid()):
+            usage = proc_usage(pid)
+            if usage:
+                rss += usage[0]
+                self._cpu[pid] = usage[1]
+        return rss, sum(self._cpu.values())
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            rss, _ = self._sample()
+            self.peak_rss = max(self.peak_rss, rss)
+
+    def start(self) -> None:
+        self.baseline_rss, _ = self._sample()
+        self._cpu_start = sum(self._cpu.values()) if self.has_proc else self._sample()[1]
+        self.peak_rss = self.baseline_rss
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> Dict[str, float]:
+        self._stop.set()
+        self._thread.join()
+        rss, cpu = self._sample()
+        self.peak_rss = max(self.peak_rss, rss)
+        return {"rss_pico_mb": self.peak_rss / 1e6, "rss_extra_mb": (self.peak_rss - self.baseline_rss) / 1e6, "cpu_s": cpu - self._cpu_start}
+
+
+def _stage(metrics: RunMetrics, name: str) -> Dict[str, Any]:
+    return metrics.run.stages[name].summary() if name in metrics.run.stages else {"count": 0}
+
+
+async def bench_links(server: MockServer, pages: int, tabs: int, out_dir: str) -> Dict[str, Any]:
+    metrics = RunMetrics()
+    scraper = VivaRealLinkScraper(
+        base_url=server.search_url, output_dir=os.path.join(out_dir, "links"), headless=True,
+        blocker=ResourceBlocker(), pacer=AdaptiveRateController.disabled("links"), metrics=metrics, page_concurrency=tabs,
+    )
+    sampler = ResourceSampler()
+    sampler.start()
+    started = time.monotonic()
+    csv_path = await scraper.scrape_links(pages)
+    elapsed = time.monotonic() - started
+    resources = sampler.stop()
+    links = 0
+    if csv_path:
+        with open(csv_path, encoding="utf-8") as f:
+            links = sum(1 for _ in f) - 1
+    goto = _stage(metrics, "busca_goto")
+    return {
+        "cenario": "links", "engine": "browser", "workers": tabs, "paginas": goto["count"], "itens": links,
+        "segundos": round(elapsed, 2), "paginas_por_s": round(goto["count"] / elapsed, 3),
+        "p50_s": goto.get("p50_s"), "p95_s": goto.get("p95_s"),
+        "mem_por_worker_mb": round(resources["rss_extra_mb"] / tabs, 1), "rss_pico_mb": round(resources["rss_pico_mb"], 1),
+        "cpu_s": round(resources["cpu_s"], 2), "cpu_pct": round(100 * resources["cpu_s"] / elapsed, 1),
+    }
+
+
+async def bench_listings(server: MockServer, count: int, engine: str, workers: int, out_dir: str) -> Dict[str, Any]:
+    metrics = RunMetrics()
+    scraper = VivaRealScraper(
+        csv_path=os.path.join(out_dir, "dados", f"bench_{engine}_{workers}.csv"), headless=True, workers=workers,
+        engine=engine, blocker=ResourceBlocker(), pacer=AdaptiveRateController.disabled("anúncios"),
+        retry_base_delay=0, metrics=metrics, home_url=f"{server.url}/", warmup_seconds=0,
+    )
+    sampler = ResourceSampler()
+    sampler.start()
+    started = time.monotonic()
+    await scraper.scrape_batch(server.listing_urls(count))
+    elapsed = time.monotonic() - started
+    resources = sampler.stop()
+    anuncio = _stage(metrics, "anuncio")
+    return {
+        "cenario": "anuncios", "engine": engine, "workers": workers, "paginas": anuncio["count"],
+        "itens": scraper.outcomes.get("ok", 0), "resultados": dict(scraper.outcomes),
+        "segundos": round(elapsed, 2), "paginas_por_s": round(anuncio["count"] / elapsed, 3),
+        "p50_s": anuncio.get("p50_s"), "p95_s": anuncio.get("p95_s"),
+        "mem_por_worker_mb": round(resources["rss_extra_mb"] / workers, 1), "rss_pico_mb": round(resources["rss_pico_mb"], 1),
+        "cpu_s": round(resources["cpu_s"], 2), "cpu_pct": round(100 * resources["cpu_s"] / elapsed, 1),
+        "etapas": metrics.snapshot()["etapas"],
+    }
+
+
+def _key(r: Dict[str, Any]) -> str:
+    return f"{r['cenario']}/{r['engine']}/w{r['workers']}"
+
+
+def comparar(atual: List[Dict[str, Any]], base: List[Dict[str, Any]], tolerancia: float) -> List[str]:
+    """Configurações cujo throughput caiu mais que ``tolerancia`` (fração) em relação à base."""
+    base_por_chave = {_key(r): r for r in base}
+    regressoes = []
+    for r in atual:
+        b = base_por_chave.get(_key(r))
+        if b and b["paginas_por_s"] and r["paginas_por_s"] < b["paginas_por_s"] * (1 - tolerancia):
+            regressoes.append(f"{_key(r)}: {r['paginas_por_s']:.2f} pág/s (base {b['paginas_por_s']:.2f})")
+    return regressoes
+
+
+def imprimir(resultados: List[Dict[str, Any]]) -> None:
+    print(f"\n{'configuração':<22} {'pág/s':>8} {'p50 s':>7} {'p95 s':>7} {'MB/worker':>10} {'CPU %':>7} {'itens':>6}")
+    for r in resultados:
+        print(f"{_key(r):<22} {r['paginas_por_s']:>8.2f} {r['p50_s'] or 0:>7.3f} {r['p95_s'] or 0:>7.3f} {r['mem_por_worker_mb']:>10.1f} {r['cpu_pct']:>7.1f} {r['itens']:>6}")
+
+
+async def main(args) -> List[Dict[str, Any]]:
+    site = MockVivaReal(per_page=args.cards_por_pagina, total_pages=max(args.paginas, 1), padding_kb=args.peso_kb)
+    resultados = []
+    with MockServer(site, latency=args.latencia, block_every=args.bloquear_cada) as server, tempfile.TemporaryDirectory() as out_dir:
+        logger.info(f"🧪 Mock em {server.url}")
+        if args.cenario in ("links", "ambos"):
+            for tabs in (int(t) for t in args.abas.split(",")):
+                resultados.append(await bench_links(server, args.paginas, tabs, out_dir))
+        if args.cenario in ("anuncios", "ambos"):
+            for engine in args.engines.split(","):
+                for workers in (int(w) for w in args.workers.split(",")):
+                    resultados.append(await bench_listings(server, args.anuncios, engine, workers, out_dir))
+        logger.info(f"🧪 Mock atendeu {server.requests} requisições ({server.bytes_sent / 1e6:.1f} MB)")
+    return resultados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark offline do scraper contra um servidor local")
+    parser.add_argument("--cenario", choices=["links", "anuncios", "ambos"], default="ambos")
+    parser.add_argument("--engines", default="browser,http", help="Engines da extração, separadas por vírgula")
+    parser.add_argument("--workers", default="1,4", help="Números de workers, separados por vírgula")
+    parser.add_argument("--paginas", type=int, default=5, help="Páginas de busca na captura de links")
+    parser.add_argument("--abas", default="1,3", help="Abas simultâneas na captura de links, separadas por vírgula")
+    parser.add_argument("--anuncios", type=int, default=60, help="Anúncios por configuração de extração")
+    parser.add_argument("--cards-por-pagina", type=int, default=30)
+    parser.add_argument("--peso-kb", type=int, default=150, help="Enchimento de cada página HTML (KB)")
+    parser.add_argument("--latencia", type=float, default=0.0, help="Atraso (s) do servidor por página HTML")
+    parser.add_argument("--bloquear-cada", type=int, default=0, help="Responde 429 a cada N anúncios (exercita as novas tentativas)")
+    parser.add_argument("--saida", type=str, help="Grava os resultados em JSON")
+    parser.add_argument("--comparar", type=str, help="JSON de uma execução anterior para detectar regressões")
+    parser.add_argument("--tolerancia", type=float, default=0.2, help="Queda de pág/s tolerada em relação à base (fração)")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Mostra o log do scraper")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+    logger.setLevel(logging.INFO)
+
+    resultados = asyncio.run(main(args))
+    imprimir(resultados)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            regressoes = comparar(resultados, json.load(f), args.tolerancia)
+        for r in regressoes:
+            print(f"❌ Regressão: {r}")
+        sys.exit(1 if regressoes else 0)
@@ -0,0 +1,118 @@
+"""Benchmark de partida: tempo de import dos módulos e até a primeira requisição.
+
+Cada medição roda num interpretador novo, como uma tarefa do Cloud Run. O
+import é medido com ``python -X importtime`` (descontada a partida do próprio
+Python), com os pacotes mais pesados listados. A primeira requisição é medida
+rodando ``main.py`` contra o ``MockServer``: do início do processo até a
+primeira página de busca chegar ao servidor (requer o Chromium do Playwright).
+Uso::
+
+    python -m benchmarks.startup --repetir 5
+    python -m benchmarks.startup --modulos main,viva_real.scraper_async --sem-requisicao
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.mock_server import MockServer, MockVivaReal
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _importtime(code: str) -> Tuple[float, List[Tuple[str, int]]]:
+    """Tempo total (s) e (módulo, µs acumulados) dos imports feitos diretamente pelo módulo medido."""
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    elapsed = time.perf_counter() - started
+    top = []
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2]
+        if not name.startswith("   ") or name.startswith("    "): # Só o nível logo abaixo do import medido
+            continue
+        top.append((name.strip(), int(parts[1])))
+    return elapsed, top
+
+
+def medir_import(modulo: str, repetir: int, base_s: float) -> Dict[str, Any]:
+    tempos, pesados = [], {}
+    for _ in range(repetir):
+        elapsed, top = _importtime(f"import {modulo}")
+        tempos.append(elapsed - base_s)
+        for name, us in top:
+            pesados.setdefault(name, []).append(us)
+    mais_pesados = sorted(((n, statistics.median(v) / 1000) for n, v in pesados.items()), key=lambda x: -x[1])[:8]
+    return {
+        "modulo": modulo, "import_s": round(statistics.median(tempos), 3),
+        "mais_pesados_ms": {n: round(ms, 1) for n, ms in mais_pesados},
+    }
+
+
+def medir_primeira_requisicao(repetir: int, timeout: float = 60.0) -> Optional[Dict[str, Any]]:
+    """Do início de ``main.py`` até a primeira página de busca chegar ao mock (mediana de ``repetir``)."""
+    tempos = []
+    with MockServer(MockVivaReal(total_pages=1)) as server, tempfile.TemporaryDirectory() as out_dir:
+        catalogo = os.path.join(out_dir, "regioes.json")
+        with open(catalogo, "w", encoding="utf-8") as f:
+            json.dump({
+                "cidade": "São Paulo", "uf": "sp", "cidade_slug": "sao-paulo",
+                "regioes": [{"slug": "bench", "nome": "Bench", "zona": "centro", "lat": 0, "lon": 0, "prioridade": 1, "url": server.search_url}],
+            }, f)
+        cmd = [
+            sys.executable, os.path.join(ROOT, "main.py"), "--catalogo", catalogo, "--regioes", "bench", "--paginas", "1",
+            "--limite-links", "1", "--sem-indice", "--contextos-reserva", "0", "--out-dir", out_dir,
+        ]
+        env = {k: v for k, v in os.environ.items() if not k.startswith(("GCS_", "CLOUD_RUN_"))}
+        for _ in range(repetir):
+            before = server.requests
+            started = time.perf_counter()
+            proc = subprocess.Popen(cmd, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+            try:
+                while server.requests == before:
+                    if proc.poll() is not None:
+                        err = [l.strip() for l in (proc.stderr.read() or "").splitlines() if "erro" in l.lower()]
+                        print(f"❌ main.py terminou sem requisição: {err[-1] if err else proc.returncode}")
+                        return None
+                    if time.perf_counter() - started > timeout:
+                        print(f"❌ Nenhuma requisição em {timeout:.0f} s")
+                        return None
+                    time.sleep(0.005)
+                tempos.append(time.perf_counter() - started)
+            finally:
+                proc.kill()
+                proc.wait()
+    return {"primeira_requisicao_s": round(statistics.median(tempos), 3), "amostras_s": [round(t, 3) for t in tempos]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de partida (imports e primeira requisição)")
+    parser.add_argument("--modulos", default="main,viva_real.scraper_async,viva_real.captura_links_async,viva_real.pipeline_full", help="Módulos medidos, separados por vírgula")
+    parser.add_argument("--repetir", type=int, default=5, help="Medições por item (é reportada a mediana)")
+    parser.add_argument("--sem-requisicao", action="store_true", help="Mede só os imports (sem Chromium)")
+    parser.add_argument("--saida", type=str, help="Grava os resultados em JSON")
+    args = parser.parse_args()
+
+    base_s = statistics.median(_importtime("pass")[0] for _ in range(args.repetir))
+    resultados: Dict[str, Any] = {"python_s": round(base_s, 3), "imports": []}
+    print(f"Partida do Python: {base_s * 1000:.0f} ms (descontada abaixo)\n")
+    for modulo in args.modulos.split(","):
+        r = medir_import(modulo.strip(), args.repetir, base_s)
+        resultados["imports"].append(r)
+        pesados = ", ".join(f"{n} {ms:.0f} ms" for n, ms in r["mais_pesados_ms"].items())
+        print(f"{r['modulo']:<36} {r['import_s'] * 1000:>7.0f} ms   ({pesados})")
+    if not args.sem_requisicao:
+        primeira = medir_primeira_requisicao(args.repetir)
+        if primeira:
+            resultados.update(primeira)
+            print(f"\nmain.py até a 1ª requisição: {primeira['primeira_requisicao_s'] * 1000:.0f} ms (amostras: {primeira['amostras_s']})")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,80 @@
+import asyncio
+
+from viva_real.utils.browser_pool import BrowserPool
+from viva_real.utils.identity_pool import IdentityPool
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.pages = []
+
+    async def close(self):
+        self.closed = True
+
+
+async def _factory(browser, identity):
+    await asyncio.sleep(0)
+    context = FakeContext()
+    return context, object()
+
+
+def _gated_factory(gate):
+    async def factory(browser, identity):
+        await gate.wait()
+        return FakeContext(), object()
+    return factory
+
+
+def _pool(prewarm=2):
+    pool = BrowserPool(prewarm=prewarm, identities=IdentityPool.build(size=6, seed=1))
+
+    async def no_browser():
+        return None
+    pool._ensure_browser = no_browser
+    return pool
+
+
+def _in_use(pool):
+    return sum(i.in_use for i in pool.identities.identities)
+
+
+def test_drop_spares_closes_idle_contexts_and_returns_identities():
+    async def run():
+        pool = _pool()
+        gate = asyncio.Event()
+        gate.set()
+        links = await pool.acquire(_factory, key="links")
+        anuncios = await pool.acquire(_gated_factory(gate), key="anuncios")
+        gate.clear()
+        await asyncio.sleep(0.05) # Reservas de "links" prontas; as de "anuncios" presas na criação
+        spares = list(pool._spares["links"])
+        assert _in_use(pool) == 6
+
+        assert await pool.drop_spares("links") == 2
+        assert all([(await t).context.closed for t in spares])
+        assert "links" not in pool._spares and len(pool._spares["anuncios"]) == 2
+        await pool.release(links)
+        assert _in_use(pool) == 3 # "anuncios": a sessão e as duas reservas em criação
+
+        await pool.drop_spares("anuncios") # Canceladas no meio da criação também devolvem a identidade
+        await pool.release(anuncios)
+        assert _in_use(pool) == 0 and not pool._spares
+
+    asyncio.run(run())
+
+
+def test_memory_rotation_drops_other_phases_spares_first():
+    async def run():
+        pool = _pool(prewarm=1)
+        links = await pool.acquire(_factory, key="links")
+        anuncios = await pool.acquire(_factory, key="anuncios")
+        await asyncio.sleep(0.01)
+        await pool.release(links)
+        anuncios = await pool.rotate(anuncios, "memória")
+        assert "links" not in pool._spares and "anuncios" in pool._spares
+        await pool.release(anuncios)
+        await pool.drop_spares()
+        assert _in_use(pool) == 0
+
+    asyncio.run(run())
@@ -0,0 +1,58 @@
+import asyncio
+
+from viva_real.captura_links_async import CARD_SELECTOR, VivaRealLinkScraper
+from viva_real.utils.rate_controller import AdaptiveRateController
+
+
+class FakeResponse:
+    def __init__(self, status):
+        self.status = status
+
+
+class FakeLocator:
+    def __init__(self, cards):
+        self.cards = cards
+
+    async def evaluate_all(self, js):
+        return self.cards
+
+
+class FakePage:
+    """Página de busca mínima: ``cards`` None simula a listagem que não aparece (timeout do seletor)."""
+
+    url = "https://www.vivareal.com.br/venda/sp/sao-paulo/"
+
+    def __init__(self, cards, status=200):
+        self.cards = cards
+        self.status = status
+
+    async def goto(self, url, **kwargs):
+        return FakeResponse(self.status)
+
+    async def wait_for_selector(self, selector, timeout=None):
+        if self.cards is None:
+            raise TimeoutError(f"Timeout {timeout}ms waiting for {selector}")
+
+    def locator(self, selector):
+        assert selector == CARD_SELECTOR
+        return FakeLocator(self.cards or [])
+
+
+def _fetch(tmp_path, page):
+    pacer = AdaptiveRateController(base_delay=0, min_delay=0, name="teste")
+    scraper = VivaRealLinkScraper(base_url=page.url, output_dir=str(tmp_path), pacer=pacer)
+    status, results = asyncio.run(scraper._fetch_page(page, 2, pace=False))
+    return status, results, pacer.failures
+
+
+def test_selector_timeout_is_a_failure_not_an_empty_page(tmp_path):
+    assert _fetch(tmp_path, FakePage(cards=None)) == (200, None, 1)
+
+
+def test_end_of_results_does_not_penalize_pacer(tmp_path):
+    assert _fetch(tmp_path, FakePage(cards=[])) == (200, [], 0)
+
+
+def test_cards_are_extracted(tmp_path):
+    status, results, failures = _fetch(tmp_path, FakePage(cards=[{"href": "/imovel/apto-id-42/", "preco": "R$ 1"}]))
+    assert results[0]["id_anuncio"] == "42" and failures == 0
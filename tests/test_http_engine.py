@@ -0,0 +1,36 @@
+import asyncio
+import time
+
+from yarl import URL
+
+from viva_real.http_engine import HttpDetailFetcher
+
+LISTING = URL("https://www.vivareal.com.br/imovel/apartamento-2-quartos-pinheiros-id-2712345678/")
+
+
+def _jar(cookies):
+    async def run():
+        fetcher = HttpDetailFetcher(user_agent="teste")
+        await fetcher.start(cookies)
+        try:
+            return fetcher._session.cookie_jar.filter_cookies(LISTING)
+        finally:
+            await fetcher.close()
+    return asyncio.run(run())
+
+
+def test_dot_domain_cookie_is_sent_to_www():
+    sent = _jar([
+        {"name": "_px3", "value": "abc", "domain": ".vivareal.com.br", "path": "/", "secure": True, "httpOnly": False, "expires": time.time() + 3600},
+        {"name": "sessao", "value": "xyz", "domain": "www.vivareal.com.br", "path": "/", "secure": False, "httpOnly": True, "expires": -1},
+    ])
+    assert sent["_px3"].value == "abc"
+    assert sent["sessao"].value == "xyz"
+
+
+def test_cookie_path_and_host_are_kept():
+    sent = _jar([
+        {"name": "outro_host", "value": "1", "domain": "glue-api.vivareal.com.br", "path": "/", "expires": -1},
+        {"name": "outro_caminho", "value": "1", "domain": ".vivareal.com.br", "path": "/conta", "expires": -1},
+    ])
+    assert "outro_host" not in sent and "outro_caminho" not in sent
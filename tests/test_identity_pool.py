@@ -0,0 +1,89 @@
+import asyncio
+
+import aiohttp
+
+from viva_real.utils.identity_pool import IdentityPool
+from viva_real.utils.outcome import BLOCK_STATUSES
+from viva_real.utils.proxy_stub import ProxyStub
+
+
+async def _origin():
+    async def handle(reader, writer):
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+        await writer.drain()
+        writer.close()
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/imovel/apto-id-1/"
+
+
+async def _session(pool, url):
+    """Uma "sessão": pega a identidade, faz uma requisição pelo proxy dela e devolve o resultado."""
+    identity = pool.acquire()
+    async with aiohttp.ClientSession() as http:
+        async with http.get(url, proxy=identity.proxy) as resp:
+            status = resp.status
+    pool.release(identity, pages=1, blocked=status in BLOCK_STATUSES)
+    return identity, status
+
+
+def _run(scenario):
+    async def run():
+        server, url = await _origin()
+        try:
+            await scenario(url)
+        finally:
+            server.close()
+            await server.wait_closed()
+    asyncio.run(run())
+
+
+def test_acquire_release_bookkeeping_and_blocked_identity_is_avoided():
+    async def scenario(url):
+        async with ProxyStub(block_after=0) as queimado, ProxyStub() as limpo:
+            pool = IdentityPool.build(proxies=[queimado.url, limpo.url], seed=1)
+            ruim, boa = sorted(pool.identities, key=lambda i: i.proxy != queimado.url)
+
+            # Duas sessões simultâneas ficam com identidades diferentes
+            a, b = pool.acquire(), pool.acquire()
+            assert {a, b} == {ruim, boa} and ruim.in_use == boa.in_use == 1 and ruim.sessions == boa.sessions == 1
+            pool.release(a, pages=3)
+            pool.release(b, pages=2)
+            assert ruim.in_use == boa.in_use == 0 and ruim.pages + boa.pages == 5
+
+            boa.in_use += 1 # Ocupada por outro worker: o pool entrega a livre
+            assert await _session(pool, url) == (ruim, 403)
+            assert ruim.consecutive_blocks == 1 and ruim.blocks == 1 and ruim.in_use == 0
+            # Recém-bloqueada só é usada sem alternativa, mesmo com a outra já em uso
+            assert await _session(pool, url) == (boa, 200)
+            assert boa.in_use == 1 and queimado.blocked == 1 and limpo.requests == 1
+
+    _run(scenario)
+
+
+def test_identity_retired_after_consecutive_blocks_and_revived_after_cooldown():
+    async def scenario(url):
+        async with ProxyStub(block_after=1) as stub:
+            pool = IdentityPool.build(proxies=[stub.url], max_consecutive_blocks=2, cooldown_minutes=30)
+            identity = pool.identities[0]
+
+            assert await _session(pool, url) == (identity, 200)
+            assert await _session(pool, url) == (identity, 403)
+            assert identity.retired_at is None
+            assert await _session(pool, url) == (identity, 403)
+            assert identity.retired_at is not None and identity.consecutive_blocks == 2
+            assert stub.requests == 3 and stub.blocked == 2
+
+            # Todas aposentadas: reaproveitada sem sair da aposentadoria
+            assert pool.acquire() is identity and identity.retired_at is not None
+            pool.release(identity)
+
+            # Passado o cooldown, volta ao pool com os bloqueios seguidos zerados
+            identity.retired_at -= pool.cooldown_seconds
+            assert pool.acquire() is identity
+            assert identity.retired_at is None and identity.consecutive_blocks == 0 and identity.in_use == 1
+            pool.release(identity)
+            assert identity.in_use == 0
+
+    _run(scenario)
@@ -0,0 +1,35 @@
+import pytest
+
+from viva_real.utils.listing_index import ListingIndex, extract_listing_id
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://www.vivareal.com.br/imovel/apartamento-2-quartos-pinheiros-id-2712345678/", "2712345678"),
+    ("https://www.vivareal.com.br/imovel/apartamento-2-quartos-pinheiros-id-2712345678", "2712345678"),
+    ("https://www.vivareal.com.br/imovel/apartamento-pinheiros-id-2712345678/?source=busca&ref=id-999", "2712345678"),
+    ("https://www.vivareal.com.br/imovel/apartamento-pinheiros-id-2712345678/#fotos", "2712345678"),
+    # Slug com um trecho parecido ("rapid-123") antes do ID real
+    ("https://www.vivareal.com.br/imovel/casa-rapid-123-quartos-id-2712345678/", "2712345678"),
+    ("https://www.vivareal.com.br/imovel/casa-acid-42-m2-id-2700000001/?page=2", "2700000001"),
+])
+def test_extract_listing_id(url, expected):
+    assert extract_listing_id(url) == expected
+
+
+@pytest.mark.parametrize("url", [
+    "",
+    "https://www.vivareal.com.br/venda/sp/sao-paulo/zona-oeste/pinheiros/",
+    "https://www.vivareal.com.br/venda/sp/sao-paulo/?ref=id-123",
+    "https://www.vivareal.com.br/imovel/casa-rapid-123-quartos/",
+])
+def test_extract_listing_id_without_id(url):
+    assert extract_listing_id(url) is None
+
+
+def test_index_key_ignores_query(tmp_path):
+    index = ListingIndex(str(tmp_path / "indice.sqlite"))
+    try:
+        index.mark_scraped("https://www.vivareal.com.br/imovel/apto-id-2712345678/?utm=x")
+        assert index.should_skip("https://www.vivareal.com.br/imovel/apto-id-2712345678/") == "recente"
+    finally:
+        index.close()
@@ -0,0 +1,14 @@
+import pytest
+
+from main import execucao_do_arquivo
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("output/dados/20261017_093000_vivareal_recentes.csv", ("20261017_093000", "recentes")),
+    ("output/dados/20261017_093000_vivareal_menor_preco.parquet", ("20261017_093000", "menor_preco")),
+    ("output/dados/teste_vivareal_padrao.shard-01-de-02.csv", ("teste", "padrao")),
+    ("output/dados/20261017_vivareal_desconhecida.csv", ("20261017", None)),
+    ("output/dados/dados.csv", (None, None)),
+])
+def test_execucao_do_arquivo(path, expected):
+    assert execucao_do_arquivo(path) == expected
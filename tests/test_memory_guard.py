@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+from viva_real.utils.memory_guard import PRECISE_MEMORY_ARG, MemoryGuard
+
+
+class FakeCDPSession:
+    def __init__(self, heap):
+        self.heap = heap
+        self.detached = False
+
+    async def send(self, method, params=None):
+        if method == "Performance.getMetrics":
+            return {"metrics": [{"name": "JSHeapTotalSize", "value": 1.0}, {"name": "JSHeapUsedSize", "value": float(self.heap)}]}
+        return {}
+
+    async def detach(self):
+        self.detached = True
+
+
+class FakeContext:
+    def __init__(self, heap):
+        self.session = FakeCDPSession(heap)
+
+    async def new_cdp_session(self, page):
+        return self.session
+
+
+class FakePage:
+    def __init__(self, heap):
+        self.context = FakeContext(heap)
+
+    async def evaluate(self, js):
+        raise AssertionError("performance.memory não deveria ser usado com CDP disponível")
+
+
+def test_heap_reads_cdp_metric():
+    guard = MemoryGuard(rss_limit_mb=0, heap_limit_mb=1)
+    page = FakePage(heap=3_000_000)
+    assert asyncio.run(guard.heap(page)) == 3_000_000
+    assert page.context.session.detached
+    assert asyncio.run(guard.page_over_limit(page))
+    assert guard.peak_heap == 3_000_000
+
+
+def test_heap_changes_after_allocation_in_chromium():
+    async_api = pytest.importorskip("playwright.async_api")
+
+    async def run():
+        async with async_api.async_playwright() as p:
+            try:
+                browser = await p.chromium.launch(args=[PRECISE_MEMORY_ARG])
+            except Exception as e:
+                pytest.skip(f"Chromium indisponível: {e}")
+            try:
+                page = await browser.new_page()
+                guard = MemoryGuard(rss_limit_mb=0)
+                before = await guard.heap(page)
+                await page.evaluate("() => { window.lastro = Array.from({length: 2e6}, (_, i) => ({i})); }")
+                after = await guard.heap(page)
+            finally:
+                await browser.close()
+        return before, after
+
+    before, after = asyncio.run(run())
+    assert before and after and after - before > 10_000_000
@@ -0,0 +1,17 @@
+from viva_real.utils import rate_controller
+from viva_real.utils.outcome import BLOCK_STATUSES, is_blocked, is_removed
+
+LINK = "https://www.vivareal.com.br/imovel/apartamento-2-quartos-pinheiros-id-2712345678/"
+
+
+def test_single_block_status_set():
+    assert rate_controller.BLOCK_STATUSES is BLOCK_STATUSES
+    assert is_blocked(407, "")
+
+
+def test_same_listing_after_redirect_is_not_removed():
+    assert not is_removed(200, "", final_url=LINK + "?source=busca#fotos", link=LINK)
+
+
+def test_redirect_to_search_is_removed():
+    assert is_removed(200, "", final_url="https://www.vivareal.com.br/venda/sp/sao-paulo/?ref=id-2712345678", link=LINK)
@@ -0,0 +1,81 @@
+import asyncio
+
+from viva_real.scraper_async import VivaRealScraper
+from viva_real.utils import outcome as oc
+
+LINK = "https://www.vivareal.com.br/imovel/apartamento-2-quartos-pinheiros-id-2712345678/"
+SEARCH = "https://www.vivareal.com.br/venda/sp/sao-paulo/zona-oeste/pinheiros/"
+
+
+class FakeFetcher:
+    def __init__(self, status, html, final_url):
+        self.response = (status, html, final_url)
+
+    async def fetch(self, link, referer=None):
+        return self.response
+
+
+def _scrape(tmp_path, status, html, final_url):
+    scraper = VivaRealScraper(csv_path=str(tmp_path / "dados.csv"), engine="http")
+    return asyncio.run(scraper._scrape_http(FakeFetcher(status, html, final_url), LINK, referer=SEARCH))
+
+
+def test_redirect_off_listing_is_removed(tmp_path):
+    assert _scrape(tmp_path, 200, "<html><h1>Imóveis à venda</h1></html>", SEARCH) == oc.REMOVIDO
+
+
+def test_removed_marker_without_data_is_removed(tmp_path):
+    assert _scrape(tmp_path, 200, "<html><p>Este anúncio foi removido</p></html>", LINK) == oc.REMOVIDO
+
+
+def test_page_without_data_falls_back_to_browser(tmp_path):
+    assert _scrape(tmp_path, 200, "<html><body>layout novo</body></html>", LINK) is None
+
+
+class FakePool:
+    memory = None
+    contexts_created = 0
+    rotations = {}
+
+    async def start(self):
+        return self
+
+    async def drop_spares(self, key=None, keep=None):
+        return 0
+
+
+def test_failed_worker_stops_the_others_before_cleanup(tmp_path):
+    scraper = VivaRealScraper(csv_path=str(tmp_path / "dados.csv"), workers=2, pool=FakePool())
+    running = set()
+    seen_at_close = []
+
+    async def worker(worker_id, pool, queue, total):
+        running.add(worker_id)
+        try:
+            if worker_id == 1:
+                await asyncio.sleep(0.01)
+                raise RuntimeError("acquire falhou")
+            await asyncio.sleep(10)
+        finally:
+            await asyncio.sleep(0) # Limpeza do worker (release da sessão)
+            running.discard(worker_id)
+
+    close = scraper.writer.close
+
+    async def writer_close():
+        seen_at_close.append(set(running))
+        await close()
+
+    scraper._worker = worker
+    scraper.writer.close = writer_close
+    queue = asyncio.Queue()
+    done = asyncio.Event()
+
+    async def run():
+        try:
+            await scraper._run_pool(queue, 2, total=None, source_done=done)
+        except RuntimeError as e:
+            return e
+
+    assert str(asyncio.run(run())) == "acquire falhou"
+    assert seen_at_close == [set()]
@@ -0,0 +1,47 @@
+import threading
+
+from main import finalizar_shard
+from viva_real.juntar_shards import arquivo_shard
+from viva_real.utils.listing_index import ListingIndex
+from viva_real.utils.sharding import Shard, ShardExchange
+
+
+def _link(i):
+    return f"https://www.vivareal.com.br/imovel/apto-id-{i}/"
+
+
+def test_shards_record_and_merge_indexes_without_lock_errors(tmp_path):
+    shared = str(tmp_path / "indice_anuncios.sqlite")
+    ListingIndex(shared).close()
+    shards = [Shard(i, 2) for i in range(2)]
+    errors = []
+
+    def run(shard):
+        # Mesmo caminho que main.py: índice próprio do shard, gravado linha a linha
+        index = ListingIndex(arquivo_shard(shared, shard))
+        try:
+            for i in range(200):
+                if shard.owns_listing(_link(i)):
+                    index.mark_scraped(_link(i))
+        except Exception as e:
+            errors.append(e)
+        finally:
+            index.close()
+
+    threads = [threading.Thread(target=run, args=(s,)) for s in shards]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert not errors
+
+    for shard in shards:
+        exchange = ShardExchange(shard, str(tmp_path / "shards"))
+        finalizar_shard(exchange, str(tmp_path / "dados.csv"), arquivo_shard(shared, shard), None, "execucao", indice_final=shared)
+
+    merged = ListingIndex(shared)
+    try:
+        assert len(merged) == 200
+        assert merged.should_skip(_link(0)) == "recente"
+    finally:
+        merged.close()
@@ -0,0 +1,41 @@
+import asyncio
+import shutil
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from viva_real.utils.writer import BufferedParquetWriter, PARQUET_FIELDS
+
+FIELDS = [name for name, _ in PARQUET_FIELDS]
+
+
+def _row(i):
+    return {"link": f"https://www.vivareal.com.br/imovel/apto-id-{i}/", "preco_venda": f"R$ {i}.000"}
+
+
+def _run(path, rows):
+    writer = BufferedParquetWriter(str(path), FIELDS, flush_rows=2)
+    for row in rows:
+        writer.write(row)
+    asyncio.run(writer.close())
+
+
+def _links(path):
+    return sorted(pq.read_table(str(path)).column("link").to_pylist())
+
+
+def test_resume_without_old_parts_keeps_final_rows(tmp_path):
+    # Contêiner novo: só o arquivo final da execução anterior foi baixado, sem as partes
+    final = tmp_path / "dados.parquet"
+    _run(final, [_row(i) for i in range(5)])
+    shutil.rmtree(tmp_path / "parts")
+    _run(final, [_row(5)])
+    assert _links(final) == sorted(_row(i)["link"] for i in range(6))
+
+
+def test_resume_with_parts_does_not_duplicate(tmp_path):
+    final = tmp_path / "dados.parquet"
+    _run(final, [_row(i) for i in range(5)])
+    _run(final, [_row(5), _row(6)])
+    assert _links(final) == sorted(_row(i)["link"] for i in range(7))
@@ -1,21 +1,87 @@
+from __future__ import annotations
+
 import csv
 import os
 import logging
 import asyncio
+import math
+import time
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import TYPE_CHECKING, List, Dict, Optional, Tuple
 from pathlib import Path
-from playwright.async_api import async_playwright, Browser, Page, BrowserContext
 from urllib.parse import urlparse, parse_qsl, urlencode, urlunparse, urljoin
-from google.cloud import storage # Import necessário
+from viva_real.utils.gcs import get_bucket
+from viva_real.utils.listing_index import extract_listing_id
+from viva_real.utils.resource_blocker import ResourceBlocker
+from viva_real.utils.outcome import BLOCK_STATUSES
+from viva_real.utils.rate_controller import AdaptiveRateController
+from viva_real.utils.browser_pool import BrowserPool, PooledSession
+from viva_real.utils.identity_pool import Identity
+from viva_real.utils.metrics import RunMetrics
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page, BrowserContext
 
 logger = logging.getLogger(__name__)
 
+CARD_SELECTOR = 'li[data-cy="rp-property-cd"]'
+# Cabeçalho da listagem, presente também na página além do último resultado (sem cards)
+RESULTS_HEADER_SELECTOR = '[data-cy="rp-title"]'
+LINK_FIELDS = ["link_anuncio", "id_anuncio", "preco", "metragem", "quartos"]
+
+CARDS_JS = """
+cards => cards.map(card => {
+  const text = (sel) => {
+    const el = card.querySelector(sel);
+    const t = el && el.innerText;
+    return t && t.trim() ? t.trim() : null;
+  };
+  const a = card.querySelector('a[href]');
+  return {
+    href: a ? a.getAttribute('href') : null,
+    preco: text('[data-cy="rp-cardProperty-price-txt"]'),
+    metragem: text('[data-cy="rp-cardProperty-propertyArea-txt"]'),
+    quartos: text('[data-cy="rp-cardProperty-bedroomQuantity-txt"]'),
+  };
+})
+"""
+
+# Total de resultados da busca: título da listagem ou estado embutido da página
+TOTAL_COUNT_JS = """
+() => {
+  const parse = (t) => {
+    const m = (t || '').match(/(\\d{1,3}(?:\\.\\d{3})+|\\d+)\\s+im[oó]ve/i);
+    return m ? parseInt(m[1].replace(/\\./g, ''), 10) : null;
+  };
+  for (const sel of ['[data-cy="rp-title"]', 'h1', '.results-summary__count', '.js-total-records']) {
+    const el = document.querySelector(sel);
+    const n = el && parse(el.innerText);
+    if (n !== null) return n;
+  }
+  const next = document.getElementById('__NEXT_DATA__');
+  const m = next && next.textContent.match(/"totalCount"\\s*:\\s*(\\d+)/);
+  return m ? parseInt(m[1], 10) : null;
+}
+"""
+
 class VivaRealLinkScraper:
-    def __init__(self, base_url: str = None, output_dir: str = "output/links", headless: bool = True):
+    POOL_KEY = "links" # Reservas do BrowserPool compartilhadas pelas capturas de todos os bairros
+    BROWSER_ARGS = ["--disable-blink-features=AutomationControlled", "--no-sandbox", "--disable-gpu"]
+    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+    def __init__(self, base_url: str = None, label: Optional[str] = None, output_dir: str = "output/links", headless: bool = True, blocker: Optional[ResourceBlocker] = None, pacer: Optional[AdaptiveRateController] = None, metrics: Optional[RunMetrics] = None, page_concurrency: int = 3, stop_if_truncated: bool = False):
         self.base_url = base_url
+        self.label = label
         self.output_dir = output_dir
         self.headless = headless
+        self.blocker = blocker
+        self.pacer = pacer or AdaptiveRateController(base_delay=2.0, min_delay=0.5, name="links")
+        self.metrics = metrics or RunMetrics()
+        self.page_concurrency = max(1, page_concurrency) # Abas lendo páginas de resultado ao mesmo tempo
+        # Com stop_if_truncated, para na página 1 se o total não couber em num_pages (o planejador divide a busca)
+        self.stop_if_truncated = stop_if_truncated
+        self.total_results: Optional[int] = None
+        self.truncated = False
         # Pega configurações de ambiente
         self.bucket_name = os.environ.get("GCS_BUCKET_NAME")
         self.execution_folder = os.environ.get("GCS_EXECUTION_FOLDER")
@@ -26,13 +92,8 @@ class VivaRealLinkScraper:
         os.makedirs(self.output_dir, exist_ok=True)
     
     def _generate_output_path(self, total_links: int) -> str:
-        # Usa o nome do bairro ou timestamp no arquivo
-        prefix = "links"
-        if "pinheiros" in self.base_url: prefix = "pinheiros"
-        elif "itaim" in self.base_url: prefix = "itaim"
-        elif "moema" in self.base_url: prefix = "moema"
-        elif "jardins" in self.base_url: prefix = "jardins"
-            
+        # Usa o slug da região (ou o último trecho do caminho da URL) no nome do arquivo
+        prefix = self.label or (urlparse(self.base_url or "").path.rstrip("/").rsplit("/", 1)[-1] or "links")
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         return str(Path(self.output_dir) / f"{prefix}_{timestamp}_{total_links}.csv")
     
@@ -40,8 +101,7 @@ class VivaRealLinkScraper:
         """Sobe o arquivo de links imediatamente para a pasta correta."""
         if not self.bucket_name or not self.execution_folder: return
         try:
-            client = storage.Client()
-            bucket = client.bucket(self.bucket_name)
+            bucket = get_bucket(self.bucket_name)
             # Estrutura: execucao_DATA/links/arquivo.csv
             blob_name = f"{self.execution_folder}/links/{os.path.basename(file_path)}"
             bucket.blob(blob_name).upload_from_filename(file_path)
@@ -49,93 +109,218 @@ class VivaRealLinkScraper:
         except Exception as e:
             logger.error(f"Erro upload links: {e}")
 
-    async def _setup_browser(self, playwright) -> Browser:
-        browser = await playwright.chromium.launch(
-            headless=self.headless,
-            args=["--disable-blink-features=AutomationControlled", "--no-sandbox", "--disable-gpu"]
-        )
-        return browser
-
-    async def _setup_context(self, browser: Browser) -> BrowserContext:
-        return await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            viewport={"width": 1366, "height": 768},
-            java_script_enabled=True,
-            locale="pt-BR",
-        )
-
-    async def _extract_links_from_page(self, page: Page) -> List[Dict[str, str]]:
+    async def _setup_context(self, browser: Browser, identity: Optional[Identity] = None) -> BrowserContext:
+        options = {
+            "user_agent": self.USER_AGENT,
+            "viewport": {"width": 1366, "height": 768},
+            "locale": "pt-BR",
+        }
+        if identity is not None:
+            options.update(identity.context_options())
+            options["extra_http_headers"] = {"Accept-Language": identity.accept_language}
+        return await browser.new_context(java_script_enabled=True, **options)
+
+    async def _extract_links_from_page(self, page: Page) -> Optional[List[Dict[str, str]]]:
+        """Cards da página; ``[]`` só quando a listagem carregou sem cards, None se ela não apareceu."""
         try:
-            await page.wait_for_selector('li[data-cy="rp-property-cd"]', timeout=30000)
-        except:
-            return [] # Retorna vazio se der timeout na lista
-            
-        cards = page.locator('li[data-cy="rp-property-cd"]')
-        count = await cards.count()
-        logger.info(f"Encontrados {count} imóveis nesta página")
+            await page.wait_for_selector(f"{CARD_SELECTOR}, {RESULTS_HEADER_SELECTOR}", timeout=30000)
+        except Exception:
+            return None # Timeout: falha a repetir, não fim dos resultados
+
+        # Uma única chamada ao navegador devolve link + resumo de todos os cards
+        cards = await page.locator(CARD_SELECTOR).evaluate_all(CARDS_JS)
+        logger.info(f"Encontrados {len(cards)} imóveis nesta página")
 
         results = []
-        for i in range(count):
-            card = cards.nth(i)
-            link_el = card.locator("a[href]")
-            if await link_el.count():
-                link = await link_el.get_attribute("href")
-                if link:
-                    try:
-                        full = urljoin(page.url, link)
-                        results.append({"link_anuncio": full})
-                    except: pass
+        for card in cards:
+            link = card.get("href")
+            if link:
+                try:
+                    full = urljoin(page.url, link)
+                    results.append({
+                        "link_anuncio": full,
+                        "id_anuncio": extract_listing_id(full),
+                        "preco": card.get("preco"),
+                        "metragem": card.get("metragem"),
+                        "quartos": card.get("quartos"),
+                    })
+                except: pass
         return results
 
     def _save_links_csv(self, links: List[Dict[str, str]], csv_path: str) -> None:
         with open(csv_path, mode="w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=["link_anuncio"])
+            writer = csv.DictWriter(f, fieldnames=LINK_FIELDS)
             writer.writeheader()
             writer.writerows(links)
 
-    async def scrape_links(self, num_pages: int = 5) -> Optional[str]:
-        results = []
-        async with async_playwright() as p:
-            browser = await self._setup_browser(p)
-            context = await self._setup_context(browser)
-            page = await context.new_page()
-            
-            try:
-                for page_number in range(1, num_pages + 1):
-                    parsed = urlparse(self.base_url)
-                    qs = dict(parse_qsl(parsed.query))
-                    qs["page"] = str(page_number)
-                    new_query = urlencode(qs, doseq=True)
-                    url = urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, new_query, parsed.fragment))
-                    
-                    logger.info(f"Página {page_number}: {url}")
-                    await page.goto(url=url, wait_until="domcontentloaded", timeout=60000)
-                    await asyncio.sleep(2) # Pausa leve
-                    
-                    page_results = await self._extract_links_from_page(page)
-                    results.extend(page_results)
-
-                # Remove duplicados e vazios
-                seen = set()
-                valid_results = []
-                for r in results:
-                    l = r.get("link_anuncio")
-                    if l and l not in seen:
-                        seen.add(l)
-                        valid_results.append(r)
-                
-                if valid_results:
-                    csv_path = self._generate_output_path(len(valid_results))
-                    self._save_links_csv(valid_results, csv_path)
-                    
-                    # UPLOAD IMEDIATO
-                    self._upload_links(csv_path)
-                    
-                    return csv_path
-                return None
+    async def _new_session(self, browser: Browser, identity: Optional[Identity] = None) -> Tuple[BrowserContext, Page]:
+        context = await self._setup_context(browser, identity)
+        if self.blocker is not None:
+            await self.blocker.attach(context)
+        return context, await context.new_page()
+
+    async def scrape_links(self, num_pages: int = 5, pool: Optional[BrowserPool] = None, link_queue: Optional[asyncio.Queue] = None) -> Optional[str]:
+        """Captura os links de ``num_pages`` páginas de resultado.
+
+        Se ``pool`` for informado, usa contextos dele (sem fechar o navegador),
+        permitindo várias capturas simultâneas num único Chromium compartilhado
+        com a extração. Se ``link_queue`` for informada, cada card novo (dict com
+        ``link_anuncio`` e o resumo do card) é publicado nela assim que sua
+        página é lida, sem esperar o fim da paginação.
+        """
+        if pool is not None:
+            return await self._scrape_links_with_pool(pool, num_pages, link_queue)
+
+        async with BrowserPool(headless=self.headless, launch_args=self.BROWSER_ARGS, prewarm=0) as pool:
+            return await self._scrape_links_with_pool(pool, num_pages, link_queue)
+
+    def _page_url(self, page_number: int) -> str:
+        parsed = urlparse(self.base_url)
+        qs = dict(parse_qsl(parsed.query))
+        qs["page"] = str(page_number)
+        return urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, urlencode(qs, doseq=True), parsed.fragment))
+
+    async def _read_total(self, page: Page) -> Optional[int]:
+        try:
+            return await page.evaluate(TOTAL_COUNT_JS)
+        except Exception:
+            return None
+
+    async def _fetch_page(self, page: Page, page_number: int, pace: bool) -> Tuple[Optional[int], Optional[List[Dict[str, str]]]]:
+        """Carrega uma página de resultados numa aba.
 
-            except Exception as e:
-                logger.error(f"Erro links: {e}")
+        Status None indica timeout/erro no carregamento; resultados None, que a
+        listagem não apareceu (timeout do seletor). ``[]`` é uma página sem cards.
+        """
+        if pace:
+            with self.metrics.stage("busca_pausa"):
+                await self.pacer.wait() # Pausa adaptativa (por aba)
+        url = self._page_url(page_number)
+        logger.info(f"Página {page_number}: {url}")
+        started = time.monotonic()
+        try:
+            with self.metrics.stage("busca_goto"):
+                response = await page.goto(url=url, wait_until="domcontentloaded", timeout=60000)
+        except Exception as e:
+            logger.warning(f"⚠️ Página {page_number} não carregou: {e}")
+            self.pacer.on_failure("erro")
+            return None, None
+        latency = time.monotonic() - started
+        status = response.status if response else None
+
+        with self.metrics.stage("busca_extracao"):
+            page_results = await self._extract_links_from_page(page)
+        if page_results is None:
+            self.pacer.on_failure("timeout", status)
+        elif status in BLOCK_STATUSES:
+            self.pacer.on_failure("bloqueio", status)
+        else:
+            self.pacer.on_success(latency) # Página sem cards no fim da busca não é falha do site
+        return status, page_results
+
+    async def _scrape_links_with_pool(self, pool: BrowserPool, num_pages: int, link_queue: Optional[asyncio.Queue] = None) -> Optional[str]:
+        """Pagina até ``num_pages``, parando antes quando os resultados acabam.
+
+        A página 1 é lida sozinha e informa o total de resultados (que limita
+        as páginas a ler). As demais são buscadas em ondas de
+        ``page_concurrency`` abas do mesmo contexto. A paginação para numa
+        página vazia além do total, ou numa página que só repete links já
+        vistos. Páginas que falharam (timeout, bloqueio ou vazias antes do fim
+        esperado) são tentadas mais uma vez.
+        """
+        results: Dict[str, Dict[str, str]] = {}
+        with self.metrics.stage("busca_sessao"):
+            session: PooledSession = await pool.acquire(self._new_session, key=self.POOL_KEY)
+        tabs = [session.page]
+        pending = list(range(1, num_pages + 1))
+        retried = set()
+        last_page: Optional[int] = None # Última página com resultados, pelo total informado
+        fetched = 0
+        stop = False
+
+        try:
+            while pending and not stop and not self.truncated:
+                reason = pool.rotation_reason(session)
+                if reason:
+                    logger.info(f"🔄 Renovando contexto da busca ({reason}).")
+                    self.metrics.inc("rotacoes", motivo=reason)
+                    with self.metrics.stage("busca_sessao"):
+                        session = await pool.rotate(session, reason)
+                    tabs = [session.page] # As abas extras fecham com o contexto antigo
+
+                wave, pending = (pending[:1], pending[1:]) if not fetched else (pending[:self.page_concurrency], pending[self.page_concurrency:])
+                while len(tabs) < len(wave):
+                    tabs.append(await session.context.new_page())
+                outcomes = await asyncio.gather(*(
+                    self._fetch_page(tab, n, pace=bool(fetched) or i > 0) for i, (tab, n) in enumerate(zip(tabs, wave))
+                ))
+                fetched += len(wave)
+
+                # Resultados processados na ordem das páginas
+                for n, (status, page_results) in zip(wave, outcomes):
+                    session.pages += 1
+                    if n == 1 and page_results and last_page is None:
+                        total = await self._read_total(tabs[0])
+                        if total is not None:
+                            self.total_results = total
+                            last_page = max(1, math.ceil(total / len(page_results)))
+                            if self.stop_if_truncated and last_page > num_pages:
+                                self.truncated = True
+                                self.metrics.inc("paginas_busca", resultado="dividida")
+                                logger.info(f"🪓 {total} resultados não cabem em {num_pages} página(s): a busca será dividida.")
+                                break
+                            pending = [p for p in pending if p <= last_page]
+                            logger.info(f"📊 {total} resultados: {min(num_pages, last_page)} página(s) a ler.")
+
+                    if not page_results:
+                        self.metrics.inc("paginas_busca", resultado="vazia" if page_results is not None else "timeout")
+                        if status in BLOCK_STATUSES:
+                            session.blocked = True
+                            self.metrics.inc("bloqueios", origem="busca", status=status)
+                        failed = page_results is None or status is None or status in BLOCK_STATUSES or (last_page is not None and n <= last_page)
+                        if failed and n not in retried:
+                            retried.add(n)
+                            pending.insert(0, n)
+                            continue
+                        if page_results is None:
+                            logger.warning(f"⚠️ Listagem da página {n} não carregou de novo: encerrando a paginação.")
+                        else:
+                            logger.info(f"🏁 Página {n} sem resultados: fim da paginação.")
+                        stop = True
+                        continue
+
+                    new = [r for r in page_results if r["link_anuncio"] not in results]
+                    if not new:
+                        self.metrics.inc("paginas_busca", resultado="repetida")
+                        logger.info(f"🏁 Página {n} só repete links já vistos: fim da paginação.")
+                        stop = True
+                        continue
+                    self.metrics.inc("paginas_busca", resultado="ok")
+                    for r in new:
+                        results[r["link_anuncio"]] = r
+                        if link_queue is not None:
+                            link_queue.put_nowait(r)
+
+            if self.truncated:
                 return None
-            finally:
-                await browser.close()
\ No newline at end of file
+            if fetched < num_pages:
+                self.metrics.inc("paginas_busca_evitadas", num_pages - fetched)
+                logger.info(f"✂️ {fetched} carregamentos de página em vez de {num_pages}.")
+
+            valid_results = list(results.values()) # Já sem duplicados, na ordem das páginas
+            if valid_results:
+                csv_path = self._generate_output_path(len(valid_results))
+                self._save_links_csv(valid_results, csv_path)
+
+                # UPLOAD IMEDIATO
+                with self.metrics.stage("upload"):
+                    await asyncio.to_thread(self._upload_links, csv_path)
+
+                return csv_path
+            return None
+
+        except Exception as e:
+            logger.error(f"Erro links: {e}")
+            return None
+        finally:
+            await pool.release(session)
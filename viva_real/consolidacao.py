@@ -0,0 +1,168 @@
+"""Consolidação das saídas de todas as execuções numa base única por anúncio.
+
+Cada execução agendada grava sua própria pasta ``execucao_<strategy>_<timestamp>``
+e o mesmo anúncio aparece em várias delas. Este módulo ingere os arquivos de
+dados (locais ou do bucket) em ``ConsolidatedStore``, pulando os que já foram
+ingeridos, e responde consultas como "preço mudou desde ontem". Uso::
+
+    python -m viva_real.consolidacao ingerir "output/dados/*.csv"
+    python -m viva_real.consolidacao ingerir --bucket meu-bucket
+    python -m viva_real.consolidacao alterados --desde 2026-10-16
+"""
+import csv
+import glob
+import logging
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from viva_real.utils.consolidated_store import ConsolidatedStore
+
+logger = logging.getLogger(__name__)
+
+CONSOLIDADO_BLOB = "indice/consolidado.sqlite"
+EXTENSOES = (".csv", ".parquet")
+
+
+def _execucao(path: str) -> Optional[str]:
+    """Nome da pasta de execução (``.../execucao_x_ts/dados/arquivo.csv``), se houver."""
+    partes = Path(path).parts
+    return next((p for p in reversed(partes) if p.startswith("execucao_")), None)
+
+
+def ler_registros(path: str) -> List[Dict[str, Any]]:
+    """Lê um arquivo de dados (CSV bruto ou Parquet tipado) como registros normalizados."""
+    import pandas as pd
+    from viva_real.pos_processamento import carregar_csvs, processar
+
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        df = pq.read_table(path).to_pandas()
+    else:
+        df = processar(carregar_csvs([path]), deduplicar=False)
+    if df.empty:
+        return []
+    df["data_extracao"] = pd.to_datetime(df["data_extracao"]).dt.strftime("%Y-%m-%d %H:%M:%S")
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict("records")
+
+
+def ingerir_locais(store: ConsolidatedStore, padroes: Iterable[str]) -> int:
+    total = 0
+    for padrao in padroes:
+        for path in sorted(glob.glob(padrao)) or [padrao]:
+            if not path.endswith(EXTENSOES) or "parts" in Path(path).parts or not os.path.isfile(path):
+                continue
+            st = os.stat(path)
+            versao = f"{st.st_size}:{st.st_mtime_ns}"
+            origem = os.path.abspath(path)
+            if store.ja_ingerido(origem, versao):
+                continue
+            n = store.ingerir(ler_registros(path), origem=origem, versao=versao, execucao=_execucao(origem))
+            logger.info(f"🗂️ {n} linhas ingeridas de {path}")
+            total += n
+    return total
+
+
+def ingerir_bucket(store: ConsolidatedStore, bucket_name: str, prefixo: str = "execucao_") -> int:
+    """Ingere os arquivos finais de dados de todas as pastas de execução do bucket."""
+    from viva_real.utils.gcs import get_client
+
+    total = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        for blob in get_client().list_blobs(bucket_name, prefix=prefixo):
+            name = blob.name
+            if "/dados/" not in name or "/parts/" in name or not name.endswith(EXTENSOES):
+                continue
+            origem = f"gs://{bucket_name}/{name}"
+            versao = str(blob.generation)
+            if store.ja_ingerido(origem, versao):
+                continue
+            local = os.path.join(tmp, os.path.basename(name))
+            blob.download_to_filename(local)
+            n = store.ingerir(ler_registros(local), origem=origem, versao=versao, execucao=_execucao(name))
+            os.remove(local)
+            logger.info(f"🗂️ {n} linhas ingeridas de {origem}")
+            total += n
+    return total
+
+
+def sincronizar_base(bucket_name: str, local_path: str, baixar: bool) -> None:
+    from viva_real.utils.gcs import get_bucket
+    try:
+        blob = get_bucket(bucket_name).blob(CONSOLIDADO_BLOB)
+        if baixar:
+            if blob.exists():
+                Path(local_path).parent.mkdir(parents=True, exist_ok=True)
+                blob.download_to_filename(local_path)
+                logger.info(f"📇 Base consolidada baixada de gs://{bucket_name}/{CONSOLIDADO_BLOB}")
+        else:
+            blob.upload_from_filename(local_path)
+            logger.info(f"📇 Base consolidada enviada para gs://{bucket_name}/{CONSOLIDADO_BLOB}")
+    except Exception as e:
+        logger.warning(f"Falha ao sincronizar base consolidada: {e}")
+
+
+def _escrever(registros: List[Dict[str, Any]], saida: Optional[str]) -> None:
+    if not registros:
+        logger.info("Nenhum resultado.")
+        return
+    f = open(saida, "w", newline="", encoding="utf-8-sig") if saida else sys.stdout
+    try:
+        writer = csv.DictWriter(f, fieldnames=list(registros[0].keys()))
+        writer.writeheader()
+        writer.writerows(registros)
+    finally:
+        if saida:
+            f.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    ontem = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d %H:%M:%S")
+
+    parser = argparse.ArgumentParser(description="Base consolidada de anúncios entre execuções")
+    parser.add_argument("--db", default="output/consolidado.sqlite", help="Arquivo SQLite da base consolidada")
+    parser.add_argument("--bucket", type=str, help="Sincroniza a base com o bucket (e ingere as execuções dele)")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_ing = sub.add_parser("ingerir", help="Ingere arquivos de dados ainda não vistos")
+    p_ing.add_argument("entradas", nargs="*", help="Arquivos ou padrões glob locais (ex: 'output/dados/*.csv')")
+    for nome, ajuda in [("alterados", "Anúncios com preço alterado"), ("novos", "Anúncios vistos pela primeira vez"), ("ausentes", "Anúncios não vistos desde a data")]:
+        p = sub.add_parser(nome, help=ajuda)
+        p.add_argument("--desde", default=ontem, help="Data/hora inicial (padrão: 24h atrás)")
+        p.add_argument("--saida", help="Grava o resultado neste CSV (padrão: stdout)")
+    p_hist = sub.add_parser("historico", help="Histórico de preço de um anúncio")
+    p_hist.add_argument("listing_id")
+    sub.add_parser("resumo", help="Totais da base")
+    args = parser.parse_args()
+
+    if args.bucket:
+        sincronizar_base(args.bucket, args.db, baixar=True)
+    store = ConsolidatedStore(args.db)
+    try:
+        if args.comando == "ingerir":
+            total = ingerir_locais(store, args.entradas)
+            if args.bucket:
+                total += ingerir_bucket(store, args.bucket)
+            logger.info(f"✅ {total} linhas novas; {len(store)} anúncios na base.")
+        elif args.comando == "alterados":
+            _escrever(store.precos_alterados(args.desde), args.saida)
+        elif args.comando == "novos":
+            _escrever(store.novos(args.desde), args.saida)
+        elif args.comando == "ausentes":
+            _escrever(store.ausentes(args.desde), args.saida)
+        elif args.comando == "historico":
+            _escrever(store.historico(args.listing_id), None)
+        else:
+            print(json.dumps(store.resumo(), indent=2, ensure_ascii=False))
+    finally:
+        store.close()
+        if args.bucket and args.comando == "ingerir":
+            sincronizar_base(args.bucket, args.db, baixar=False)
@@ -0,0 +1,149 @@
+import json
+import logging
+import time
+from http.cookies import SimpleCookie
+from typing import Any, Dict, List, Optional, Tuple
+
+import aiohttp
+from parsel import Selector
+from yarl import URL
+
+from viva_real.scraper_async import (
+    NOME_SELECTOR, PRECO_SELECTOR, ENDERECO_SELECTOR, CONDOMINIO_SELECTOR, IPTU_SELECTOR, AMENITIES_SELECTOR,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _text(sel: Selector, css: str) -> Optional[str]:
+    el = sel.css(css)
+    if not el:
+        return None
+    t = " ".join(t.strip() for t in el[0].css("::text").getall() if t.strip())
+    return t or None
+
+
+def _num(v: Any) -> Optional[float]:
+    try:
+        return float(v) if v not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _completar_com_json(blobs: List[Any], out: Dict[str, Any]) -> None:
+    """Mesma busca em largura do EXTRACT_LISTING_JS: coordenadas, endereço e preço."""
+    queue = list(blobs)
+    visited = 0
+    while queue and visited < 20000:
+        node = queue.pop(0)
+        visited += 1
+        if isinstance(node, list):
+            queue.extend(v for v in node if isinstance(v, (dict, list)))
+            continue
+        if not isinstance(node, dict):
+            continue
+        if out["latitude"] is None:
+            lat = _num(node.get("latitude", node.get("lat")))
+            lon = _num(node.get("longitude", node.get("lon", node.get("lng"))))
+            if lat and lon:
+                out["latitude"], out["longitude"] = lat, lon
+        if not out["endereco"] and node.get("@type") == "PostalAddress":
+            parts = [node.get("streetAddress"), node.get("addressLocality"), node.get("addressRegion")]
+            out["endereco"] = " - ".join(p for p in parts if p) or None
+        if not out["preco"] and node.get("@type") == "Offer" and _num(node.get("price")):
+            out["preco"] = "R$ " + f"{int(_num(node['price'])):,}".replace(",", ".")
+        queue.extend(v for v in node.values() if isinstance(v, (dict, list)))
+
+
+def parse_listing_html(html: str) -> Dict[str, Any]:
+    """Extrai do HTML cru os mesmos campos que o ``EXTRACT_LISTING_JS`` devolve no navegador."""
+    sel = Selector(text=html)
+    out: Dict[str, Any] = {
+        "nome": _text(sel, NOME_SELECTOR),
+        "preco": _text(sel, PRECO_SELECTOR),
+        "endereco": _text(sel, ENDERECO_SELECTOR),
+        "condominio": _text(sel, CONDOMINIO_SELECTOR),
+        "iptu": _text(sel, IPTU_SELECTOR),
+        "caracteristicas": [
+            " ".join(t.strip() for t in el.css("::text").getall() if t.strip())
+            for el in sel.css(AMENITIES_SELECTOR)
+        ],
+        "imagens": [
+            src for src in (img.attrib.get("src") or img.attrib.get("data-src") for img in sel.css("img"))
+            if src and ("vivareal" in src or "olx" in src) and "icon" not in src and not src.endswith(".svg")
+        ],
+        "latitude": None,
+        "longitude": None,
+    }
+
+    blobs = []
+    for raw in sel.css('script[type="application/ld+json"]::text').getall() + sel.css("script#__NEXT_DATA__::text").getall():
+        try:
+            blobs.append(json.loads(raw))
+        except ValueError:
+            continue
+    _completar_com_json(blobs, out)
+    return out
+
+
+class HttpDetailFetcher:
+    """Busca o HTML dos anúncios por HTTP com conexões reaproveitadas.
+
+    Usa os cookies e o user agent de uma sessão Playwright já aquecida, para que
+    as requisições pareçam continuação da navegação.
+    """
+
+    def __init__(self, user_agent: str, headers: Optional[Dict[str, str]] = None, max_connections: int = 4, timeout: float = 30, proxy: Optional[str] = None):
+        self.user_agent = user_agent
+        self.proxy = proxy
+        self.headers = dict(headers or {})
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @staticmethod
+    def _morsel(c: Dict[str, Any]) -> SimpleCookie:
+        """Cookie do ``context.cookies()`` com domínio, caminho e ``secure`` preservados.
+
+        Um domínio com ponto (".vivareal.com.br") continua valendo para os
+        subdomínios; sem ele o aiohttp grava um cookie só do host.
+        """
+        cookie = SimpleCookie()
+        cookie[c["name"]] = c["value"]
+        morsel = cookie[c["name"]]
+        if c["domain"].startswith("."):
+            morsel["domain"] = c["domain"]
+        morsel["path"] = c.get("path") or "/"
+        if c.get("secure"):
+            morsel["secure"] = True
+        if c.get("httpOnly"):
+            morsel["httponly"] = True
+        expires = c.get("expires")
+        if expires and expires > 0:
+            morsel["max-age"] = str(max(0, int(expires - time.time())))
+        return cookie
+
+    async def start(self, cookies: List[Dict[str, Any]]) -> None:
+        jar = aiohttp.CookieJar(unsafe=True)
+        for c in cookies:
+            if c.get("domain"):
+                jar.update_cookies(self._morsel(c), response_url=URL(f"https://{c['domain'].lstrip('.')}/"))
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300),
+            cookie_jar=jar,
+            headers={**self.headers, "User-Agent": self.user_agent},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+        )
+
+    async def fetch(self, link: str, referer: Optional[str] = None) -> Tuple[int, str, str]:
+        """(status, HTML, URL final depois dos redirecionamentos)."""
+        if self._session is None:
+            raise RuntimeError("HttpDetailFetcher.start() não foi chamado")
+        headers = {"Referer": referer} if referer else None
+        async with self._session.get(link, headers=headers, allow_redirects=True, proxy=self.proxy) as resp:
+            return resp.status, await resp.text(errors="replace"), str(resp.url)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,115 @@
+"""Junta os arquivos de dados dos shards de uma execução num arquivo único.
+
+Numa execução com ``--shard i/n`` (ou ``taskCount`` > 1 no Cloud Run), cada
+shard grava ``<execucao>_vivareal_<strategy>.shard-XX-de-NN.<csv|parquet>``
+na mesma pasta. O último shard a terminar chama ``juntar_execucao``; o
+comando abaixo refaz a junção manualmente (ex.: se um shard caiu)::
+
+    python -m viva_real.juntar_shards output/dados/exec1_vivareal_padrao.csv --shards 4
+    python -m viva_real.juntar_shards output/dados/exec1_vivareal_padrao.csv --shards 4 --bucket meu-bucket --pasta execucao_padrao_exec1
+"""
+import csv
+import logging
+import os
+from typing import List, Optional
+
+from viva_real.utils.sharding import Shard, ShardExchange
+
+logger = logging.getLogger(__name__)
+
+
+def arquivo_shard(destino: str, shard: Shard) -> str:
+    base, ext = os.path.splitext(destino)
+    return f"{base}.{shard.label}{ext}"
+
+
+def localizar_shards(destino: str, count: int, bucket_name: Optional[str] = None, pasta: Optional[str] = None) -> List[str]:
+    """Arquivos de dados de cada shard, baixando de ``<pasta>/dados/`` os que não estão no disco."""
+    arquivos = []
+    for i in range(count):
+        path = arquivo_shard(destino, Shard(i, count))
+        if not os.path.exists(path) and bucket_name and pasta:
+            from viva_real.utils.gcs import get_bucket
+            blob = get_bucket(bucket_name).blob(f"{pasta}/dados/{os.path.basename(path)}")
+            if blob.exists():
+                blob.download_to_filename(path)
+        if os.path.exists(path):
+            arquivos.append(path)
+        else:
+            logger.warning(f"⚠️ Arquivo do shard {i}/{count} não encontrado: {os.path.basename(path)}")
+    return arquivos
+
+
+def juntar(arquivos: List[str], destino: str) -> int:
+    """Concatena os arquivos (todos CSV ou todos Parquet) em ``destino``; devolve o total de linhas."""
+    if destino.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        from viva_real.utils.writer import parquet_schema
+        schema = parquet_schema()
+        total = 0
+        with pq.ParquetWriter(destino, schema, compression="zstd") as writer:
+            for path in arquivos:
+                table = pq.read_table(path, schema=schema)
+                writer.write_table(table)
+                total += table.num_rows
+        return total
+
+    total = 0
+    seen = set()
+    with open(destino, "w", newline="", encoding="utf-8-sig") as out:
+        writer = None
+        for path in arquivos:
+            with open(path, encoding="utf-8-sig", newline="") as f:
+                reader = csv.DictReader(f)
+                if writer is None:
+                    writer = csv.DictWriter(out, fieldnames=reader.fieldnames)
+                    writer.writeheader()
+                for row in reader:
+                    # Shards são disjuntos por ID; a checagem só protege contra reexecuções
+                    link = row.get("link")
+                    if link in seen:
+                        continue
+                    seen.add(link)
+                    writer.writerow(row)
+                    total += 1
+    return total
+
+
+def juntar_indices(index_path: str, exchange: ShardExchange) -> None:
+    """Incorpora ao índice local os índices publicados por todos os shards."""
+    from viva_real.utils.listing_index import ListingIndex
+    index = ListingIndex(index_path)
+    try:
+        for i in range(exchange.shard.count):
+            path = exchange.fetch_file(f"indice-{Shard(i, exchange.shard.count).label}.sqlite")
+            if path:
+                index.merge_from(path)
+        logger.info(f"📇 Índices dos shards incorporados ({len(index)} anúncios).")
+    finally:
+        index.close()
+
+
+def juntar_execucao(destino: str, count: int, bucket_name: Optional[str] = None, pasta: Optional[str] = None) -> Optional[str]:
+    arquivos = localizar_shards(destino, count, bucket_name, pasta)
+    if not arquivos:
+        return None
+    total = juntar(arquivos, destino)
+    logger.info(f"🧩 {len(arquivos)} shard(s) juntados em {destino} ({total} linhas).")
+    if bucket_name and pasta:
+        from viva_real.utils.gcs import get_bucket
+        get_bucket(bucket_name).blob(f"{pasta}/dados/{os.path.basename(destino)}").upload_from_filename(destino)
+    return destino
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    parser = argparse.ArgumentParser(description="Junta os arquivos de dados dos shards de uma execução")
+    parser.add_argument("destino", help="Arquivo final (os dos shards ficam ao lado, com .shard-XX-de-NN)")
+    parser.add_argument("--shards", type=int, required=True, help="Número de shards da execução")
+    parser.add_argument("--bucket", type=str)
+    parser.add_argument("--pasta", type=str, help="Pasta da execução no bucket (execucao_<strategy>_<execucao>)")
+    args = parser.parse_args()
+    if not juntar_execucao(args.destino, args.shards, args.bucket, args.pasta):
+        raise SystemExit(1)
@@ -21,7 +21,7 @@ def read_links_from_csv(path: Path) -> List[str]:
     # Remove duplicados preservando ordem
     return list(dict.fromkeys(links))
 
-async def run_pipeline_async(links_csv: str | Path, out_csv: str | None = None, headless: bool = True, limit: int | None = None) -> None:
+async def run_pipeline_async(links_csv: str | Path, out_csv: str | None = None, headless: bool = True, limit: int | None = None, workers: int = 1) -> None:
     links_path = Path(links_csv)
     links = read_links_from_csv(links_path)
     
@@ -31,10 +31,10 @@ async def run_pipeline_async(links_csv: str | Path, out_csv: str | None = None,
 
     # AQUI ESTA A MUDANÇA:
     # Em vez de loop for aqui, passamos tudo para o scraper gerenciar a sessão
-    scraper = VivaRealScraper(csv_path=out_csv, headless=headless)
+    scraper = VivaRealScraper(csv_path=out_csv, headless=headless, workers=workers)
     
     logger.info("Enviando lote de links para o scraper (Sessão Única)...")
     await scraper.scrape_batch(links)
 
-def run_pipeline(links_csv: str | Path, out_csv: str | None = None, headless: bool = True, limit: int | None = None) -> None:
-    asyncio.run(run_pipeline_async(links_csv, out_csv, headless, limit))
\ No newline at end of file
+def run_pipeline(links_csv: str | Path, out_csv: str | None = None, headless: bool = True, limit: int | None = None, workers: int = 1) -> None:
+    asyncio.run(run_pipeline_async(links_csv, out_csv, headless, limit, workers))
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""Pós-processamento em lote dos CSVs de dados extraídos.
+
+Lê um ou mais ``output/dados/*.csv``, normaliza endereço, preço, área e
+cômodos de forma vetorizada (pandas ``.str``) e grava um dataset limpo e
+deduplicado por anúncio. Uso::
+
+    python -m viva_real.pos_processamento "output/dados/*.csv" --saida output/processado/dados.parquet
+    python -m viva_real.pos_processamento "output/dados/*.csv" --benchmark
+"""
+import glob
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Iterable, List, Union
+
+import pandas as pd
+
+from viva_real.utils.functions_utils import parse_endereco
+from viva_real.utils.listing_index import LISTING_ID_RE
+from viva_real.utils.normalizacao import VALOR_RE, INT_RE, normalizar_registro, parse_lista
+from viva_real.utils.writer import PARQUET_FIELDS
+
+logger = logging.getLogger(__name__)
+
+# Formato dominante "Rua X, 123 - Bairro, Município - UF". Linhas que casam aqui
+# dão o mesmo resultado de parse_endereco; as demais caem no parser por linha.
+ENDERECO_RE = (
+    r"^\s*(?P<logradouro>[^,\-]+?)\s*,\s*(?P<numero>[^,\-]*\d[^,\-]*?)\s*-\s*"
+    r"(?P<bairro>[^,\-]+?)\s*,\s*(?P<municipio>[^,\-]+?)\s*-\s*(?P<uf>[A-Za-z]{2})\s*$"
+)
+ENDERECO_COLS = ["logradouro", "numero", "bairro", "municipio", "uf"]
+
+INT32_COLS = ["quartos", "banheiros", "suites", "vagas", "qtd_imagens"]
+VALOR_COLS = ["preco_venda", "condominio", "iptu"]
+LIST_COLS = ["outros", "caracteristicas", "urls_imagens"]
+
+
+def expandir_caminhos(padroes: Iterable[str]) -> List[str]:
+    paths: List[str] = []
+    for padrao in padroes:
+        paths.extend(sorted(glob.glob(padrao)) or [padrao])
+    return [p for p in dict.fromkeys(paths) if Path(p).is_file() and not p.endswith(".progresso.jsonl")]
+
+
+def carregar_csvs(paths: Iterable[str]) -> pd.DataFrame:
+    frames = [
+        pd.read_csv(p, dtype=object, keep_default_na=False, encoding="utf-8-sig")
+        for p in paths
+    ]
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True).replace("", pd.NA)
+
+
+def _por_unicos(s: pd.Series, func: Callable) -> Union[pd.Series, pd.DataFrame]:
+    """Aplica ``func`` só aos valores distintos e espalha o resultado de volta.
+
+    Meses de histórico repetem o mesmo anúncio (endereço, preço, listas) dia após
+    dia, então o trabalho cai de "uma vez por linha" para "uma vez por valor".
+    """
+    codes, uniques = pd.factorize(s, use_na_sentinel=False)
+    res = func(pd.Series(uniques, dtype=object))
+    out = res.iloc[codes]
+    out.index = s.index
+    return out
+
+
+def _valor_reais(s: pd.Series) -> pd.Series:
+    def _parse(u: pd.Series) -> pd.Series:
+        texto = u.str.extract(VALOR_RE)[0].str.replace(".", "", regex=False)
+        return pd.to_numeric(texto, errors="coerce")
+    return _por_unicos(s, _parse).astype("Int64")
+
+
+def _area(s: pd.Series) -> pd.Series:
+    def _parse(u: pd.Series) -> pd.Series:
+        partes = u.str.extract(VALOR_RE)
+        inteiro = partes[0].str.replace(".", "", regex=False)
+        return pd.to_numeric(inteiro.where(partes[1].isna(), inteiro + "." + partes[1]), errors="coerce")
+    return _por_unicos(s, _parse).astype("float64")
+
+
+def _inteiro(s: pd.Series) -> pd.Series:
+    return _por_unicos(s, lambda u: pd.to_numeric(u.str.extract(INT_RE)[0], errors="coerce")).astype("Int32")
+
+
+def _lista(s: pd.Series) -> pd.Series:
+    return _por_unicos(s, lambda u: u.map(lambda v: parse_lista(v) if isinstance(v, str) else []))
+
+
+def _parse_enderecos(enderecos: pd.Series) -> pd.DataFrame:
+    out = enderecos.str.extract(ENDERECO_RE)
+    out["uf"] = out["uf"].str.upper()
+
+    # Fallback por linha só para os formatos fora do padrão
+    resto = enderecos.notna() & out["logradouro"].isna()
+    if resto.any():
+        parsed = pd.DataFrame(
+            [parse_endereco(e) for e in enderecos[resto]], index=enderecos.index[resto], columns=ENDERECO_COLS
+        )
+        out.loc[resto, ENDERECO_COLS] = parsed
+    return out[ENDERECO_COLS]
+
+
+def _enderecos(enderecos: pd.Series) -> pd.DataFrame:
+    return _por_unicos(enderecos, _parse_enderecos)
+
+
+def processar(df: pd.DataFrame, deduplicar: bool = True) -> pd.DataFrame:
+    """Normaliza o DataFrame bruto para o esquema tipado (mesmo de ``--formato parquet``)."""
+    if df.empty:
+        return pd.DataFrame(columns=[name for name, _ in PARQUET_FIELDS])
+    df = df.reindex(columns=sorted(set(df.columns) | {name for name, _ in PARQUET_FIELDS} - {"id_anuncio"}))
+    out = pd.DataFrame(index=df.index)
+    out["id_anuncio"] = _por_unicos(df["link"], lambda u: u.str.extract(LISTING_ID_RE)[0])
+    for col in ["nome_anunciante", "tipo_transacao", "endereco", "link"]:
+        out[col] = df[col]
+    out[ENDERECO_COLS] = _enderecos(df["endereco"])
+    for col in VALOR_COLS:
+        out[col] = _valor_reais(df[col])
+    out["metragem"] = _area(df["metragem"])
+    for col in INT32_COLS:
+        out[col] = _inteiro(df[col])
+    out["latitude"] = pd.to_numeric(df["latitude"], errors="coerce")
+    out["longitude"] = pd.to_numeric(df["longitude"], errors="coerce")
+    for col in LIST_COLS:
+        out[col] = _lista(df[col])
+    out["data_extracao"] = pd.to_datetime(df["data_extracao"], format="%Y-%m-%d %H:%M:%S", errors="coerce", cache=True)
+
+    if deduplicar:
+        # Mantém a extração mais recente de cada anúncio (links sem ID deduplicam pela URL)
+        chave = out["id_anuncio"].fillna(out["link"])
+        out = out.assign(_chave=chave).sort_values("data_extracao", kind="stable")
+        out = out.drop_duplicates("_chave", keep="last").drop(columns="_chave")
+    return out[[name for name, _ in PARQUET_FIELDS]].reset_index(drop=True)
+
+
+def salvar(df: pd.DataFrame, destino: str) -> None:
+    Path(destino).parent.mkdir(parents=True, exist_ok=True)
+    if destino.endswith(".parquet"):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        from viva_real.utils.writer import parquet_schema
+        table = pa.Table.from_pandas(df, schema=parquet_schema(), preserve_index=False, safe=False)
+        pq.write_table(table, destino, compression="zstd")
+    else:
+        df.to_csv(destino, index=False, encoding="utf-8-sig")
+
+
+def benchmark(df: pd.DataFrame) -> dict:
+    """Compara o caminho por linha (parse_endereco + normalizar_registro) com o vetorizado."""
+    registros = df.astype(object).where(df.notna(), None).to_dict("records")
+
+    t0 = time.perf_counter()
+    for row in registros:
+        parse_endereco(row.get("endereco"))
+        normalizar_registro(row)
+    por_linha = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    processado = processar(df, deduplicar=False)
+    vetorizado = time.perf_counter() - t0
+
+    # Confere o atalho de endereço contra o parser por linha
+    divergencias = sum(
+        parse_endereco(e) != {k: (None if pd.isna(v) else v) for k, v in zip(ENDERECO_COLS, vals)}
+        for e, vals in zip(
+            df["endereco"].drop_duplicates(),
+            processado.loc[df["endereco"].drop_duplicates().index, ENDERECO_COLS].itertuples(index=False),
+        )
+        if isinstance(e, str)
+    )
+
+    return {
+        "linhas": len(df),
+        "por_linha_s": round(por_linha, 4),
+        "vetorizado_s": round(vetorizado, 4),
+        "speedup": round(por_linha / vetorizado, 2) if vetorizado else None,
+        "divergencias_endereco": divergencias,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    parser = argparse.ArgumentParser(description="Pós-processamento vetorizado dos CSVs de dados do VivaReal")
+    parser.add_argument("entradas", nargs="+", help="Arquivos ou padrões glob (ex: 'output/dados/*.csv')")
+    parser.add_argument("--saida", default="output/processado/dados.parquet", help="Destino (.parquet ou .csv)")
+    parser.add_argument("--benchmark", action="store_true", help="Mede caminho por linha x vetorizado e sai")
+    parser.add_argument("--repetir", type=int, default=1, help="Replica as linhas N vezes no benchmark")
+    args = parser.parse_args()
+
+    paths = expandir_caminhos(args.entradas)
+    bruto = carregar_csvs(paths)
+    logger.info(f"📥 {len(bruto)} linhas lidas de {len(paths)} arquivo(s).")
+
+    if args.benchmark:
+        amostra = pd.concat([bruto] * max(1, args.repetir), ignore_index=True)
+        print(json.dumps(benchmark(amostra), indent=2))
+    else:
+        t0 = time.perf_counter()
+        limpo = processar(bruto)
+        salvar(limpo, args.saida)
+        logger.info(f"✅ {len(limpo)} anúncios únicos gravados em {args.saida} ({time.perf_counter() - t0:.2f}s).")
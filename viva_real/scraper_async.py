@@ -1,26 +1,146 @@
+from __future__ import annotations
+
 import csv
 import os
 import logging
 import asyncio
 import random
+import json
+import time
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, Dict, List, Optional, Any, Tuple
 from viva_real.utils.functions_utils import parse_endereco
-import json
-from playwright.async_api import async_playwright, Browser, Page, BrowserContext
-from playwright_stealth import Stealth
-from google.cloud import storage
+from viva_real.utils.listing_index import ListingIndex, card_fingerprint
+from viva_real.utils.progress_journal import ProgressJournal
+from viva_real.utils.resource_blocker import ResourceBlocker
+from viva_real.utils.rate_controller import AdaptiveRateController
+from viva_real.utils import outcome as oc
+from viva_real.utils.writer import BufferedCsvWriter, BufferedParquetWriter
+from viva_real.utils.browser_pool import BrowserPool, PooledSession
+from viva_real.utils.memory_guard import PRECISE_MEMORY_ARG
+from viva_real.utils.identity_pool import Identity
+from viva_real.utils.metrics import RunMetrics
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, Page, BrowserContext
 
 logger = logging.getLogger(__name__)
 
+NOME_SELECTOR = 'a[data-testid="official-store-redirect-link"], .publisher-name'
+PRECO_SELECTOR = "div.price-info__values-sale .value-item__value, [data-testid='price-value'], .price__value"
+ENDERECO_SELECTOR = 'p[data-testid="location-address"], .location__address'
+CONDOMINIO_SELECTOR = '[data-testid="condoFee"]'
+IPTU_SELECTOR = '[data-testid="iptu"]'
+AMENITIES_SELECTOR = ".amenities-item-text, [data-testid='amenities-item']"
+IMG_FILTER_JS = "src => src && (src.includes('vivareal') || src.includes('olx')) && !src.includes('icon') && !src.endsWith('.svg')"
+
+# Extrai todos os campos do anúncio numa única chamada ao navegador. Os seletores
+# do DOM têm prioridade; o JSON embutido (JSON-LD e __NEXT_DATA__) completa o que
+# faltar e fornece latitude/longitude.
+EXTRACT_LISTING_JS = """
+() => {
+  const text = (sel) => {
+    const el = document.querySelector(sel);
+    const t = el && el.innerText;
+    return t && t.trim() ? t.trim() : null;
+  };
+  const out = {
+    nome: text(%(nome)s),
+    preco: text(%(preco)s),
+    endereco: text(%(endereco)s),
+    condominio: text(%(condominio)s),
+    iptu: text(%(iptu)s),
+    caracteristicas: Array.from(document.querySelectorAll(%(amenities)s)).map(e => e.innerText),
+    imagens: Array.from(document.querySelectorAll('img')).map(e => e.src || e.getAttribute('data-src')).filter(%(img_filter)s),
+    latitude: null,
+    longitude: null,
+  };
+
+  const num = (v) => (v === null || v === undefined || v === '' || isNaN(Number(v))) ? null : Number(v);
+  const blobs = [];
+  document.querySelectorAll('script[type="application/ld+json"]').forEach(s => {
+    try { blobs.push(JSON.parse(s.textContent)); } catch (e) {}
+  });
+  const next = document.getElementById('__NEXT_DATA__');
+  if (next) { try { blobs.push(JSON.parse(next.textContent)); } catch (e) {} }
+
+  // Busca em largura limitada por coordenadas, endereço e preço
+  let visited = 0;
+  const queue = blobs.slice();
+  while (queue.length && visited < 20000) {
+    const node = queue.shift();
+    visited++;
+    if (!node || typeof node !== 'object') continue;
+    if (out.latitude === null) {
+      const lat = num(node.latitude !== undefined ? node.latitude : node.lat);
+      const lon = num(node.longitude !== undefined ? node.longitude : (node.lon !== undefined ? node.lon : node.lng));
+      if (lat !== null && lon !== null && lat !== 0 && lon !== 0) { out.latitude = lat; out.longitude = lon; }
+    }
+    if (!out.endereco && node['@type'] === 'PostalAddress') {
+      out.endereco = [node.streetAddress, node.addressLocality, node.addressRegion].filter(Boolean).join(' - ') || null;
+    }
+    if (!out.preco && node['@type'] === 'Offer' && node.price) {
+      out.preco = 'R$ ' + Number(node.price).toLocaleString('pt-BR');
+    }
+    for (const k in node) {
+      const v = node[k];
+      if (v && typeof v === 'object') queue.push(v);
+    }
+  }
+  return out;
+}
+""" % {
+    "nome": json.dumps(NOME_SELECTOR), "preco": json.dumps(PRECO_SELECTOR), "endereco": json.dumps(ENDERECO_SELECTOR),
+    "condominio": json.dumps(CONDOMINIO_SELECTOR), "iptu": json.dumps(IPTU_SELECTOR), "amenities": json.dumps(AMENITIES_SELECTOR),
+    "img_filter": IMG_FILTER_JS,
+}
+
 class VivaRealScraper:
-    def __init__(self, csv_path: Optional[str] = None, headless: bool = False):
+    BATCH_SIZE = 50 # Links por sessão (contexto) de cada worker, se o pool não for informado
+    BROWSER_ARGS = ["--disable-blink-features=AutomationControlled", "--no-sandbox", "--disable-gpu", "--disable-dev-shm-usage", "--window-size=1920,1080", "--start-maximized", "--ignore-certificate-errors", PRECISE_MEMORY_ARG]
+    HOME_URL = "https://www.vivareal.com.br/" # Aquecimento de cada sessão nova
+    ENGINES = ("browser", "http")
+    FORMATS = ("csv", "parquet")
+    USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36"
+    EXTRA_HEADERS = {"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8", "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7", "Sec-Fetch-Dest": "document", "Sec-Fetch-Mode": "navigate", "Sec-Fetch-Site": "same-origin", "Sec-Fetch-User": "?1"}
+
+    def __init__(self, csv_path: Optional[str] = None, headless: bool = False, workers: int = 1, index: Optional[ListingIndex] = None, journal: Optional[ProgressJournal] = None, engine: str = "browser", blocker: Optional[ResourceBlocker] = None, pacer: Optional[AdaptiveRateController] = None, output_format: str = "csv", pool: Optional[BrowserPool] = None, max_attempts: int = 3, retry_base_delay: float = 30.0, retry_max_delay: float = 600.0, metrics: Optional[RunMetrics] = None, home_url: Optional[str] = None, warmup_seconds: float = 5.0):
+        if engine not in self.ENGINES:
+            raise ValueError(f"Engine inválida: {engine} (use {', '.join(self.ENGINES)})")
+        if output_format not in self.FORMATS:
+            raise ValueError(f"Formato inválido: {output_format} (use {', '.join(self.FORMATS)})")
         if csv_path is None:
             data_capt = datetime.now().strftime("%Y%m%d")
-            self.csv_path = f"output/dados/{data_capt}_vivareal.csv"
+            self.csv_path = f"output/dados/{data_capt}_vivareal.{output_format}"
         else:
             self.csv_path = csv_path
         self.headless = headless
+        self.output_format = output_format
+        self.workers = max(1, workers)
+        self.index = index
+        self.journal = journal
+        self.engine = engine
+        self.blocker = blocker
+        self.pacer = pacer or AdaptiveRateController(base_delay=5.0, name="anúncios")
+        self.home_url = home_url or self.HOME_URL
+        self.warmup_seconds = warmup_seconds
+        self.pool = pool # Navegador compartilhado (ex.: com a captura de links); senão cada execução abre o seu
+        # Fila de novas tentativas: orçamento por link e backoff exponencial
+        self.max_attempts = max(1, max_attempts)
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self._attempts: Dict[str, int] = {}
+        self._needs_fresh_context: set = set()
+        self._retry_tasks: set = set()
+        self.outcomes: Dict[str, int] = {}
+        # Tempo por etapa, contadores e bytes (<dados>.metricas.json / .metricas.jsonl por lote)
+        self._owns_metrics = metrics is None # Quem cria as métricas grava o resumo final
+        self.metrics = metrics or RunMetrics(os.path.splitext(self.csv_path)[0], batch_every=self.BATCH_SIZE)
+        self.metrics.add_collector("ritmo_anuncios", lambda: {"intervalo_s": round(self.pacer.delay, 2), "sucessos": self.pacer.successes, "falhas": self.pacer.failures})
+        if blocker is not None:
+            self.metrics.add_collector("bloqueador_anuncios", blocker.stats)
+        self.cards: Dict[str, Dict[str, Any]] = {} # Resumo dos cards da busca, por link
+        self._processed = 0
         self.bucket_name = os.environ.get("GCS_BUCKET_NAME")
         self.execution_folder = os.environ.get("GCS_EXECUTION_FOLDER")
 
@@ -32,46 +152,37 @@ class VivaRealScraper:
         ]
         self._ensure_output_dir()
         
-        if not os.path.exists(self.csv_path):
+        if output_format == "csv" and not os.path.exists(self.csv_path):
             with open(self.csv_path, "w", newline="", encoding="utf-8-sig") as f:
                 writer = csv.DictWriter(f, fieldnames=self.fields)
                 writer.writeheader()
+
+        # Gravação em lotes + sincronização incremental com o GCS em segundo plano
+        writer_cls = BufferedParquetWriter if output_format == "parquet" else BufferedCsvWriter
+        self.writer = writer_cls(self.csv_path, self.fields, bucket_name=self.bucket_name, remote_folder=self.execution_folder, on_flush=self._on_rows_flushed, metrics=self.metrics)
     
     def _ensure_output_dir(self) -> None:
         os.makedirs(os.path.dirname(self.csv_path), exist_ok=True)
     
-    def _upload_live_debug(self, file_path: str):
-        if not self.bucket_name or not self.execution_folder or not os.path.exists(file_path): return
-        try:
-            client = storage.Client()
-            bucket = client.bucket(self.bucket_name)
-            filename = os.path.basename(file_path)
-            blob_name = f"{self.execution_folder}/dados/{filename}" if file_path.endswith(".csv") else f"{self.execution_folder}/debug/{filename}"
-            bucket.blob(blob_name).upload_from_filename(file_path)
-        except: pass
-
-    async def _setup_browser(self, playwright) -> Browser:
-        return await playwright.chromium.launch(
-            headless=self.headless, 
-            args=["--disable-blink-features=AutomationControlled", "--no-sandbox", "--disable-gpu", "--disable-dev-shm-usage", "--window-size=1920,1080", "--start-maximized", "--ignore-certificate-errors"]
-        )
-
-    async def _setup_context(self, browser: Browser) -> BrowserContext:
-        return await browser.new_context(
-            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0.0.0 Safari/537.36",
-            viewport={"width": 1920, "height": 1080},
-            java_script_enabled=True,
-            locale="pt-BR",
-            timezone_id="America/Sao_Paulo",
-            extra_http_headers={"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,*/*;q=0.8", "Accept-Language": "pt-BR,pt;q=0.9,en-US;q=0.8,en;q=0.7", "Sec-Fetch-Dest": "document", "Sec-Fetch-Mode": "navigate", "Sec-Fetch-Site": "same-origin", "Sec-Fetch-User": "?1"}
-        )
+    async def _setup_context(self, browser: Browser, identity: Optional[Identity] = None) -> BrowserContext:
+        options = {
+            "user_agent": self.USER_AGENT,
+            "viewport": {"width": 1920, "height": 1080},
+            "locale": "pt-BR",
+            "timezone_id": "America/Sao_Paulo",
+        }
+        headers = dict(self.EXTRA_HEADERS)
+        if identity is not None:
+            options.update(identity.context_options())
+            headers["Accept-Language"] = identity.accept_language
+        return await browser.new_context(java_script_enabled=True, extra_http_headers=headers, **options)
 
     async def _human_behavior(self, page: Page):
         try:
             try: await page.locator("button:has-text('Aceitar'), button:has-text('Prosseguir'), #cookie-notifier-cta").click(timeout=2000)
             except: pass
             await page.mouse.move(random.randint(100, 500), random.randint(100, 500), steps=20)
-            await asyncio.sleep(0.5)
+            await asyncio.sleep(self.pacer.scaled(0.5))
             await page.mouse.wheel(0, 300)
         except: pass
 
@@ -80,8 +191,8 @@ class VivaRealScraper:
         text = await el.inner_text() if await el.count() > 0 else None
         return text.strip() if text else None
 
-    async def extrair_caracteristicas(self, page):
-        els = await page.locator(".amenities-item-text, [data-testid='amenities-item']").all_inner_texts()
+    @staticmethod
+    def _classificar_caracteristicas(els: List[str]) -> Dict[str, Any]:
         lower = [c.lower() for c in els]
         def _f(p): 
             for i,c in enumerate(lower): 
@@ -94,87 +205,430 @@ class VivaRealScraper:
             "caracteristicas": els
         }
 
-    async def _extract_data(self, page: Page, link: str) -> Dict[str, Any]:
-        feats = await self.extrair_caracteristicas(page)
-        nome = await self._safe_text(page, 'a[data-testid="official-store-redirect-link"], .publisher-name')
-        preco = await self._safe_text(page, "div.price-info__values-sale .value-item__value, [data-testid='price-value'], .price__value")
-        addr = await self._safe_text(page, 'p[data-testid="location-address"], .location__address')
+    async def extrair_caracteristicas(self, page):
+        els = await page.locator(AMENITIES_SELECTOR).all_inner_texts()
+        return self._classificar_caracteristicas(els)
+
+    async def _extract_raw_locators(self, page: Page) -> Dict[str, Any]:
+        """Caminho antigo (um round-trip por campo), mantido como fallback."""
+        return {
+            "nome": await self._safe_text(page, NOME_SELECTOR),
+            "preco": await self._safe_text(page, PRECO_SELECTOR),
+            "endereco": await self._safe_text(page, ENDERECO_SELECTOR),
+            "condominio": await self._safe_text(page, CONDOMINIO_SELECTOR),
+            "iptu": await self._safe_text(page, IPTU_SELECTOR),
+            "caracteristicas": await page.locator(AMENITIES_SELECTOR).all_inner_texts(),
+            "imagens": await page.locator("img").evaluate_all(f"els => els.map(e => e.src || e.getAttribute('data-src')).filter({IMG_FILTER_JS})"),
+            "latitude": None, "longitude": None,
+        }
+
+    async def _extract_raw(self, page: Page) -> Dict[str, Any]:
+        """Lê todos os campos num único ``evaluate`` (DOM + JSON embutido da página)."""
+        try:
+            return await page.evaluate(EXTRACT_LISTING_JS)
+        except Exception as e:
+            logger.debug(f"Extração em lote falhou ({e}), usando seletores individuais.")
+            return await self._extract_raw_locators(page)
+
+    def _montar_registro(self, raw: Dict[str, Any], link: str) -> Dict[str, Any]:
+        feats = self._classificar_caracteristicas(raw.get("caracteristicas") or [])
+        addr = raw.get("endereco")
         parsed = parse_endereco(addr) if addr else {}
-        imgs = await page.locator("img").evaluate_all("els => els.map(e => e.src || e.getAttribute('data-src')).filter(src => src && (src.includes('vivareal') || src.includes('olx')) && !src.includes('icon') && !src.endsWith('.svg'))")
+        imgs = raw.get("imagens") or []
 
         return {
-            "nome_anunciante": nome, "tipo_transacao": "Venda", "preco_venda": preco, "endereco": addr,
+            "nome_anunciante": raw.get("nome"), "tipo_transacao": "Venda", "preco_venda": raw.get("preco"), "endereco": addr,
             "logradouro": parsed.get("logradouro"), "numero": parsed.get("numero"), "bairro": parsed.get("bairro"),
             "municipio": parsed.get("municipio"), "uf": parsed.get("uf"), "metragem": feats.get("metragem"),
             "quartos": feats.get("quartos"), "banheiros": feats.get("banheiros"), "suites": feats.get("suites"),
             "vagas": feats.get("vagas"), "outros": json.dumps(feats.get("outros", []), ensure_ascii=False),
-            "caracteristicas": feats.get("caracteristicas"), "latitude": None, "longitude": None,
-            "condominio": await self._safe_text(page, '[data-testid="condoFee"]'), "iptu": await self._safe_text(page, '[data-testid="iptu"]'),
+            "caracteristicas": feats.get("caracteristicas"), "latitude": raw.get("latitude"), "longitude": raw.get("longitude"),
+            "condominio": raw.get("condominio"), "iptu": raw.get("iptu"),
             "qtd_imagens": len(imgs), "urls_imagens": "; ".join(list(set(imgs))[:15]),
             "data_extracao": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "link": link
         }
 
+    async def _extract_data(self, page: Page, link: str) -> Dict[str, Any]:
+        return self._montar_registro(await self._extract_raw(page), link)
+
     def _save_to_csv(self, data):
-        if "urls_imagens" in data: data["urls_imagens"] = f'"{data["urls_imagens"]}"'
-        with open(self.csv_path, "a", newline="", encoding="utf-8-sig") as f:
-            writer = csv.DictWriter(f, fieldnames=self.fields)
-            writer.writerow(data)
-
-    async def scrape_batch(self, links: List[str], save_debug: bool = True):
-        # CONFIGURAÇÃO DO LOTE
-        BATCH_SIZE = 50 
-        logger.info(f"🔥 INICIANDO PROCESSAMENTO DE {len(links)} LINKS EM LOTES DE {BATCH_SIZE}...")
-
-        # Divide a lista gigante em pedaços menores
-        chunks = [links[i:i + BATCH_SIZE] for i in range(0, len(links), BATCH_SIZE)]
-
-        for batch_idx, chunk in enumerate(chunks, 1):
-            logger.info(f"🔄 Iniciando Lote {batch_idx}/{len(chunks)} ({len(chunk)} links) - Reiniciando Sessão...")
-            
-            async with async_playwright() as p:
-                browser = await self._setup_browser(p)
-                context = await self._setup_context(browser)
-                await Stealth().apply_stealth_async(context)
-                page = await context.new_page()
-
-                # AQUECIMENTO DA SESSÃO NOVA
+        if self.output_format == "csv" and "urls_imagens" in data: data["urls_imagens"] = f'"{data["urls_imagens"]}"'
+        self.writer.write(data)
+
+    async def _new_session(self, browser: Browser, identity: Optional[Identity] = None) -> Tuple[BrowserContext, Page]:
+        """Abre um contexto novo (com stealth e a identidade do pool) e aquece a sessão na home."""
+        from playwright_stealth import Stealth
+        context = await self._setup_context(browser, identity)
+        await Stealth().apply_stealth_async(context)
+        if self.blocker is not None:
+            await self.blocker.attach(context)
+        page = await context.new_page()
+
+        # AQUECIMENTO DA SESSÃO NOVA
+        try:
+            await page.goto(self.home_url, timeout=60000)
+            await asyncio.sleep(self.warmup_seconds)
+        except: pass
+        return context, page
+
+    def _persistir(self, link: str, data: Dict[str, Any]) -> None:
+        with self.metrics.stage("gravacao"):
+            self._save_to_csv(data)
+
+    def _on_rows_flushed(self, rows: List[Dict[str, Any]]) -> None:
+        """Índice e diário só registram o anúncio depois que a linha está em disco."""
+        for data in rows:
+            link = data["link"]
+            if self.index is not None:
+                self.index.mark_scraped(link, self._card_fingerprint(link) or card_fingerprint(data.get("preco_venda"), data.get("metragem"), data.get("quartos")))
+            if self.journal is not None:
+                self.journal.record(link, "ok")
+        if self.journal is not None:
+            self.writer.sync_file(self.journal.path)
+
+    async def _scrape_http(self, fetcher, link: str, referer: str, session: Optional[PooledSession] = None) -> Optional[str]:
+        """Tenta o anúncio por HTTP; None indica que o navegador deve assumir."""
+        from viva_real.http_engine import parse_listing_html
+        try:
+            with self.metrics.stage("http"):
+                status, html, final_url = await fetcher.fetch(link, referer=referer)
+        except Exception as e:
+            logger.info(f"🌐 HTTP falhou ({e}), usando navegador.")
+            return None
+        self.metrics.inc("bytes", len(html.encode("utf-8", "replace")), direcao="http")
+        if oc.is_blocked(status, html):
+            logger.info(f"🛡️ Bloqueio/desafio no HTTP (status {status}), usando navegador.")
+            self.metrics.inc("bloqueios", origem="http", status=status or "-")
+            self.pacer.on_failure(oc.BLOQUEIO, status)
+            if session is not None:
+                session.blocked = True
+            return None
+        if oc.is_removed(status, "", final_url, link): # 404/410 ou redirecionado para fora do anúncio
+            return oc.REMOVIDO
+        with self.metrics.stage("extracao"):
+            data = self._montar_registro(parse_listing_html(html), link)
+        if not data['preco_venda'] and not data['endereco']:
+            # Mesma classificação do navegador; só a falha de parse volta para ele
+            if oc.classify_empty_page(status, html, final_url, link) == oc.REMOVIDO:
+                return oc.REMOVIDO
+            logger.info("🌐 HTTP sem dados, usando navegador.")
+            return None
+        self._persistir(link, data)
+        logger.info("✅ Dados extraídos (HTTP)!")
+        return oc.OK
+
+    async def _scrape_one(self, page: Page, link: str, fetcher=None, session: Optional[PooledSession] = None) -> str:
+        """Extrai um anúncio e classifica o resultado (ok, bloqueio, removido, timeout, falha_parse, erro).
+
+        O resultado alimenta o controle de ritmo; bloqueio marca a sessão para
+        rotação imediata.
+        """
+        from playwright.async_api import TimeoutError as PlaywrightTimeoutError # Já carregado: há uma página aberta
+        started = time.monotonic()
+        if fetcher is not None:
+            result = await self._scrape_http(fetcher, link, referer=page.url, session=session)
+            if result is not None:
+                self.pacer.on_success(time.monotonic() - started)
+                self._log_outcome(result)
+                return result
+
+        status = None
+        latency = None
+        try:
+            with self.metrics.stage("goto"):
+                response = await page.goto(link, referer=page.url, timeout=60000, wait_until="domcontentloaded")
+            status = response.status if response else None
+            latency = time.monotonic() - started
+            if status in oc.REMOVED_STATUSES:
+                result = oc.REMOVIDO
+            else:
+                with self.metrics.stage("comportamento"):
+                    await self._human_behavior(page)
+                with self.metrics.stage("extracao"):
+                    await page.wait_for_selector("body", timeout=30000)
+                    data = await self._extract_data(page, link)
+                if data['preco_venda'] or data['endereco']:
+                    self._persistir(link, data)
+                    result = oc.OK
+                else:
+                    # Sem dados: descobre se é desafio, anúncio removido ou mudança de layout
+                    result = oc.classify_empty_page(status, await page.content(), page.url, link)
+        except PlaywrightTimeoutError:
+            result = oc.TIMEOUT
+        except Exception as e:
+            logger.warning(f"❌ Erro: {e}")
+            result = oc.ERRO
+
+        if result in (oc.OK, oc.REMOVIDO):
+            self.pacer.on_success(latency)
+        else:
+            self.pacer.on_failure(result, status)
+        if result == oc.BLOQUEIO:
+            self.metrics.inc("bloqueios", origem="navegador", status=status or "-")
+            if session is not None:
+                session.blocked = True
+        self._log_outcome(result, status)
+        return result
+
+    def _log_outcome(self, result: str, status: Optional[int] = None) -> None:
+        self.outcomes[result] = self.outcomes.get(result, 0) + 1
+        self.metrics.inc("resultados", tipo=result)
+        if result == oc.OK:
+            logger.info("✅ Dados extraídos!")
+        elif result == oc.REMOVIDO:
+            logger.info(f"🗑️ Anúncio removido{f' (status {status})' if status else ''}.")
+        else:
+            logger.warning(f"❌ {result}{f' (status {status})' if status else ''}")
+
+    def _handle_outcome(self, link: str, result: str, queue: asyncio.Queue) -> None:
+        """Registra o resultado final ou agenda nova tentativa com backoff exponencial."""
+        if result == oc.OK:
+            return # Diário e índice registram quando a linha chega ao disco
+        if result in oc.RETRYABLE_OUTCOMES:
+            attempts = self._attempts[link] = self._attempts.get(link, 0) + 1
+            if attempts < self.max_attempts:
+                delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** (attempts - 1)) * random.uniform(0.8, 1.2)
+                logger.info(f"🔁 Nova tentativa em {delay:.0f}s ({attempts + 1}/{self.max_attempts}), em contexto novo: {link}")
+                self._needs_fresh_context.add(link)
+                self.metrics.inc("novas_tentativas", motivo=result)
+                task = asyncio.create_task(self._requeue(queue, link, delay))
+                self._retry_tasks.add(task)
+                task.add_done_callback(self._retry_tasks.discard)
+                return
+            logger.warning(f"🚫 Desistindo após {attempts} tentativa(s) ({result}): {link}")
+        if self.journal is not None:
+            self.journal.record(link, result)
+            self.writer.sync_file(self.journal.path)
+
+    @staticmethod
+    async def _requeue(queue: asyncio.Queue, link: str, delay: float) -> None:
+        await asyncio.sleep(delay)
+        queue.put_nowait(link)
+
+    async def _close_when_done(self, queue: asyncio.Queue, workers: int, source_done: asyncio.Event) -> None:
+        """Envia o sinal de parada só quando a fonte acabou, a fila esvaziou e não há novas tentativas pendentes."""
+        await source_done.wait()
+        while True:
+            await queue.join()
+            if not self._retry_tasks:
+                break
+            await asyncio.gather(*list(self._retry_tasks), return_exceptions=True)
+        for _ in range(workers):
+            queue.put_nowait(None)
+
+    async def _new_fetcher(self, context: BrowserContext, identity: Optional[Identity] = None):
+        """Cliente HTTP que herda os cookies (e a identidade) da sessão aquecida (engine ``http``)."""
+        from viva_real.http_engine import HttpDetailFetcher
+        if identity is not None:
+            headers = {**self.EXTRA_HEADERS, "Accept-Language": identity.accept_language}
+            fetcher = HttpDetailFetcher(user_agent=identity.user_agent, headers=headers, proxy=identity.proxy)
+        else:
+            fetcher = HttpDetailFetcher(user_agent=self.USER_AGENT, headers=self.EXTRA_HEADERS)
+        await fetcher.start(await context.cookies())
+        return fetcher
+
+    async def _worker(self, worker_id: int, pool: BrowserPool, queue: asyncio.Queue, total: Optional[int]):
+        """Consome links da fila com sessão e ritmo próprios.
+
+        Cada worker pega um contexto do pool e o troca conforme a política de
+        rotação (páginas, tempo ou bloqueio); as pausas de cortesia valem por
+        worker, não para o pool inteiro.
+        """
+        session: Optional[PooledSession] = None
+        fetcher = None
+
+        # Escalona a partida para os workers não aquecerem todos ao mesmo tempo
+        await asyncio.sleep(self.pacer.scaled((worker_id - 1) * random.uniform(1, 3)))
+
+        try:
+            while True:
+                link = await queue.get()
                 try:
-                    await page.goto("https://www.vivareal.com.br/", timeout=60000)
-                    await asyncio.sleep(5)
+                    if link is None:
+                        break
+
+                    reason = pool.rotation_reason(session) if session is not None else None
+                    if session is not None and not reason and link in self._needs_fresh_context and session.pages:
+                        reason = "nova tentativa"
+                    self._needs_fresh_context.discard(link)
+                    if session is None or reason:
+                        if fetcher is not None:
+                            await fetcher.close()
+                            fetcher = None
+                        if session is None:
+                            logger.info(f"🔄 [W{worker_id}] Iniciando nova sessão...")
+                            with self.metrics.stage("sessao"):
+                                session = await pool.acquire(self._new_session)
+                        else:
+                            logger.info(f"🏁 [W{worker_id}] Renovando contexto ({reason}).")
+                            self.metrics.inc("rotacoes", motivo=reason)
+                            with self.metrics.stage("sessao"):
+                                session = await pool.rotate(session, reason)
+                            with self.metrics.stage("pausa_sessao"):
+                                if pool.rotates_egress:
+                                    # Contexto novo já sai por outro IP: basta o intervalo normal
+                                    await self.pacer.wait()
+                                else:
+                                    # PAUSA ENTRE LOTES (longa só se a sessão anterior teve falhas)
+                                    await self.pacer.session_pause()
+                        if self.engine == "http":
+                            fetcher = await self._new_fetcher(session.context, session.identity)
+                    elif self.engine != "http" and await pool.check_page(session):
+                        # Heap da página cresceu além do limite: página nova, mesmo contexto aquecido
+                        logger.info(f"🧠 [W{worker_id}] Página reciclada (heap JS acima do limite).")
+                        self.metrics.inc("reciclagens", motivo="heap")
+
+                    self._processed += 1
+                    logger.info(f"[W{worker_id}] [{self._processed}/{total or '?'}] >> {link}")
+
+                    with self.metrics.stage("anuncio"):
+                        result = await self._scrape_one(session.page, link, fetcher, session=session)
+                    session.pages += 1
+                    self._handle_outcome(link, result, queue)
+                    self.metrics.tick()
+
+                    with self.metrics.stage("pausa"):
+                        await self.pacer.wait() # Pausa adaptativa entre imóveis
+                finally:
+                    queue.task_done()
+        finally:
+            if fetcher is not None:
+                try: await fetcher.close()
                 except: pass
+            if session is not None:
+                await pool.release(session)
+
+    def _card_fingerprint(self, link: str) -> Optional[str]:
+        card = self.cards.get(link)
+        if not card:
+            return None
+        return card_fingerprint(card.get("preco"), card.get("metragem"), card.get("quartos"))
+
+    def _should_skip(self, link: str) -> bool:
+        if self.index is None:
+            return False
+        reason = self.index.should_skip(link, self._card_fingerprint(link))
+        if reason:
+            logger.info(f"⏭️ Pulando ({reason}): {link}")
+            return True
+        return False
+
+    async def scrape_batch(self, links: List[str], save_debug: bool = True, cards: Optional[Dict[str, Dict[str, Any]]] = None):
+        if cards:
+            self.cards.update(cards)
+        if self.journal is not None:
+            self.writer.sync_file(self.journal.plan_path)
+            total = len(links)
+            links = self.journal.pending(links)
+            if total != len(links):
+                logger.info(f"♻️ Retomando: {total - len(links)} de {total} links já concluídos.")
+
+        if self.index is not None:
+            total = len(links)
+            links = [l for l in links if not self._should_skip(l)]
+            logger.info(f"📇 Índice: {total - len(links)} de {total} links pulados (recentes ou inalterados).")
 
-                # PROCESSA OS LINKS DO LOTE ATUAL
-                for i, link in enumerate(chunk, 1):
-                    global_idx = ((batch_idx - 1) * BATCH_SIZE) + i
-                    logger.info(f"[{global_idx}/{len(links)}] >> {link}")
-                    
-                    try:
-                        await page.goto(link, referer=page.url, timeout=60000, wait_until="domcontentloaded")
-                        await self._human_behavior(page)
-                        await page.wait_for_selector("body", timeout=30000)
-                        
-                        data = await self._extract_data(page, link)
-                        
-                        if not data['preco_venda'] and not data['endereco']:
-                            raise Exception("Dados vazios")
-
-                        self._save_to_csv(data)
-                        self._upload_live_debug(self.csv_path) # Salva incremental
-                        logger.info("✅ Dados extraídos!")
-                        
-                        await asyncio.sleep(random.uniform(3, 7)) # Pausa entre imóveis
-
-                    except Exception as e:
-                        logger.warning(f"❌ Erro: {e}")
-                        # Lógica de erro mantida...
-                        await asyncio.sleep(5)
-
-                logger.info(f"🏁 Fim do Lote {batch_idx}. Fechando navegador para limpeza.")
-                await browser.close()
-            
-            # PAUSA LONGA ENTRE LOTES (Sessões)
-            logger.info("💤 Pausa para troca de IP/Sessão...")
-            await asyncio.sleep(random.uniform(20, 40))
+        workers = max(1, min(self.workers, len(links)))
+        logger.info(f"🔥 INICIANDO PROCESSAMENTO DE {len(links)} LINKS COM {workers} WORKER(S) (LOTES DE {self.BATCH_SIZE} POR SESSÃO)...")
+        if not links:
+            return
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for link in links:
+            queue.put_nowait(link)
+        source_done = asyncio.Event()
+        source_done.set()
+
+        await self._run_pool(queue, workers, total=len(links), source_done=source_done)
+
+    async def scrape_stream(self, source: asyncio.Queue, limit: Optional[int] = None):
+        """Extrai os links conforme chegam em ``source`` (modo produtor/consumidor).
+
+        O produtor publica links (ou dicts de card com ``link_anuncio``) durante
+        a paginação e envia ``None`` ao final. Links repetidos são descartados;
+        ``limit`` corta o total aceito.
+        """
+        logger.info(f"🔥 INICIANDO PROCESSAMENTO EM STREAMING COM {self.workers} WORKER(S)...")
+        queue: asyncio.Queue = asyncio.Queue()
+        source_done = asyncio.Event()
+        seen = set()
+
+        async def _dispatcher():
+            try:
+                while True:
+                    item = await source.get()
+                    if item is None:
+                        break
+                    if isinstance(item, dict):
+                        link = item.get("link_anuncio")
+                        if not link:
+                            continue
+                        self.cards.setdefault(link, item)
+                    else:
+                        link = item
+                    if link in seen or (limit and len(seen) >= limit):
+                        continue
+                    if self.journal is not None:
+                        self.journal.add_to_plan(link)
+                        self.writer.sync_file(self.journal.plan_path)
+                        if self.journal.is_done(link):
+                            seen.add(link)
+                            continue
+                    if self._should_skip(link):
+                        seen.add(link)
+                        continue
+                    seen.add(link)
+                    queue.put_nowait(link)
+            finally:
+                source_done.set()
+
+        await self._run_pool(queue, self.workers, total=None, source_done=source_done, extra=[_dispatcher()])
+        logger.info(f"🏁 Streaming encerrado: {len(seen)} links únicos recebidos.")
+
+    async def _run_pool(self, queue: asyncio.Queue, workers: int, total: Optional[int], source_done: asyncio.Event, extra: Optional[list] = None):
+        self._processed = 0
+        await self.writer.start()
+        pool = self.pool or BrowserPool(headless=self.headless, launch_args=self.BROWSER_ARGS, max_pages=self.BATCH_SIZE)
+        self.metrics.on_write = self.writer.sync_file
+        self.metrics.add_collector("pool", lambda: {"contextos_criados": pool.contexts_created, **{f"rotacoes_{k}": v for k, v in pool.rotations.items()}})
+        if pool.memory is not None and pool.memory.enabled:
+            self.metrics.add_collector("memoria", pool.memory.stats)
+        closer = asyncio.create_task(self._close_when_done(queue, workers, source_done))
+        tasks: List[asyncio.Task] = []
+        try:
+            await pool.start()
+            tasks = [asyncio.create_task(c) for c in [*(extra or []), *(
+                self._worker(worker_id, pool, queue, total)
+                for worker_id in range(1, workers + 1)
+            )]]
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            failed = next((t for t in done if not t.cancelled() and t.exception() is not None), None)
+            if failed is not None:
+                logger.error(f"❌ Worker falhou ({failed.exception()!r}); encerrando os demais.")
+                raise failed.exception()
+        finally:
+            # Nenhum worker pode seguir usando páginas ou o writer depois do fechamento abaixo
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            closer.cancel()
+            for task in list(self._retry_tasks):
+                task.cancel()
+            if self.outcomes:
+                logger.info("📊 Resultados: " + ", ".join(f"{k}: {v}" for k, v in sorted(self.outcomes.items())))
+            if pool is not self.pool:
+                await pool.close()
+            else:
+                await pool.drop_spares(self._new_session) # O pool compartilhado continua aberto depois desta extração
+            if self._owns_metrics:
+                self.metrics.write_summary() # Antes do close: o writer agenda o upload para a pasta da execução
+            else:
+                self.metrics.flush_batch()
+            await self.writer.close()
+            self.metrics.on_write = None
+            if self.blocker is not None:
+                self.blocker.log_summary("(anúncios)")
+            logger.info(self.pacer.status())
 
     async def scrape_link(self, link: str):
         return await self.scrape_batch([link])
\ No newline at end of file
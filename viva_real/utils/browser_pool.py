@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from viva_real.utils.identity_pool import Identity, IdentityPool
+from viva_real.utils.memory_guard import MemoryGuard
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, Page
+
+logger = logging.getLogger(__name__)
+
+SessionFactory = Callable[["Browser", Optional[Identity]], Awaitable[Tuple["BrowserContext", "Page"]]]
+
+
+class PooledSession:
+    """Contexto + página emprestados do pool, com o uso contado para a rotação."""
+
+    def __init__(self, context: BrowserContext, page: Page, factory: SessionFactory, key: Hashable, identity: Optional[Identity] = None):
+        self.context = context
+        self.page = page
+        self.factory = factory
+        self.key = key
+        self.identity = identity
+        self.created = time.monotonic()
+        self.pages = 0
+        self.blocked = False
+
+    @property
+    def age_minutes(self) -> float:
+        return (time.monotonic() - self.created) / 60
+
+
+class BrowserPool:
+    """Um único Chromium por execução, compartilhado entre captura de links e extração.
+
+    Os contextos são criados por uma ``factory`` (cada fase tem a sua: stealth,
+    aquecimento, bloqueador) e renovados conforme a política de rotação: após
+    ``max_pages`` páginas, ``max_minutes`` minutos ou um bloqueio detectado. O
+    processo do navegador continua vivo; enquanto um contexto trabalha, o
+    próximo já é aquecido em segundo plano (``prewarm`` reservas por tipo de sessão).
+    Com ``identities``, cada contexto recebe sua própria identidade (proxy, user
+    agent, viewport, idioma), devolvida com o resultado da sessão ao ser fechado.
+    Com ``memory``, a memória também entra na rotação: a RSS acima do limite
+    renova contextos e ``check_page`` troca a página cuja heap JS cresceu demais.
+    """
+
+    def __init__(
+        self,
+        headless: bool = True,
+        launch_args: Optional[List[str]] = None,
+        max_pages: int = 50,
+        max_minutes: float = 15.0,
+        rotate_on_block: bool = True,
+        prewarm: int = 1,
+        identities: Optional[IdentityPool] = None,
+        memory: Optional[MemoryGuard] = None,
+    ):
+        self.headless = headless
+        self.launch_args = launch_args or []
+        self.max_pages = max_pages
+        self.max_minutes = max_minutes
+        self.rotate_on_block = rotate_on_block
+        self.prewarm = max(0, prewarm)
+        self.identities = identities
+        self.memory = memory
+        self._playwright = None
+        self._browser: Optional[Browser] = None
+        self._launch_lock = asyncio.Lock()
+        self._spares: Dict[Hashable, List[asyncio.Task]] = {}
+        self.contexts_created = 0
+        self.rotations: Dict[str, int] = {}
+
+    async def start(self) -> "BrowserPool":
+        await self._ensure_browser()
+        return self
+
+    async def __aenter__(self) -> "BrowserPool":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _ensure_browser(self) -> Browser:
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return self._browser
+            if self._browser is not None:
+                logger.warning("⚠️ Navegador desconectado; iniciando outro.")
+            if self._playwright is None:
+                from playwright.async_api import async_playwright # Só quando o primeiro navegador abre
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+            return self._browser
+
+    async def _create(self, factory: SessionFactory, key: Hashable) -> PooledSession:
+        browser = await self._ensure_browser()
+        identity = self.identities.acquire() if self.identities is not None else None
+        try:
+            context, page = await factory(browser, identity)
+        except BaseException:
+            if identity is not None:
+                self.identities.release(identity)
+            raise
+        self.contexts_created += 1
+        return PooledSession(context, page, factory, key, identity)
+
+    def _schedule_spares(self, factory: SessionFactory, key: Hashable) -> None:
+        spares = [t for t in self._spares.get(key, []) if not t.cancelled()]
+        while len(spares) < self.prewarm:
+            spares.append(asyncio.create_task(self._create(factory, key)))
+        self._spares[key] = spares
+
+    async def acquire(self, factory: SessionFactory, key: Optional[Hashable] = None) -> PooledSession:
+        """Entrega um contexto pronto (reserva já aquecida, se houver) e agenda a próxima reserva.
+
+        ``key`` agrupa as reservas: factories equivalentes (ex.: a captura de
+        cada bairro) compartilham as mesmas. O padrão é a própria factory.
+        """
+        key = factory if key is None else key
+        session = None
+        spares = self._spares.get(key, [])
+        while spares and session is None:
+            task = spares.pop(0)
+            try:
+                session = await task
+            except Exception as e:
+                logger.warning(f"Falha ao pré-aquecer contexto: {e}")
+        if session is None:
+            session = await self._create(factory, key)
+        self._schedule_spares(factory, key)
+        return session
+
+    async def drop_spares(self, key: Optional[Hashable] = None, keep: Optional[Hashable] = None) -> int:
+        """Cancela e fecha as reservas de ``key`` (de todas as chaves, sem ``key``), menos as de ``keep``.
+
+        Chamado quando uma fase deixa de pedir contextos (fim da captura de
+        links), para as reservas dela não segurarem memória e identidades até
+        o ``close()``. Devolve quantos contextos foram fechados.
+        """
+        dropped = 0
+        for k in [k for k in self._spares if (key is None or k == key) and k != keep]:
+            spares = self._spares.pop(k)
+            for task in spares:
+                task.cancel()
+            for task in spares:
+                try:
+                    await self.release(await task) # Pronta antes do cancelamento: fecha e devolve a identidade
+                    dropped += 1
+                except (Exception, asyncio.CancelledError):
+                    pass # Cancelada durante a criação: _create já devolveu a identidade
+        return dropped
+
+    def rotation_reason(self, session: PooledSession) -> Optional[str]:
+        if self.rotate_on_block and session.blocked:
+            return "bloqueio"
+        if self.memory is not None and self.memory.should_rotate():
+            return "memória"
+        if self.max_pages and session.pages >= self.max_pages:
+            return "páginas"
+        if self.max_minutes and session.age_minutes >= self.max_minutes:
+            return "tempo"
+        return None
+
+    async def check_page(self, session: PooledSession) -> bool:
+        """A cada ``check_every`` páginas, troca a página da sessão se a heap JS passou do limite."""
+        if self.memory is None or not self.memory.due(session.pages):
+            return False
+        if not await self.memory.page_over_limit(session.page):
+            return False
+        await self.recycle_page(session)
+        return True
+
+    async def recycle_page(self, session: PooledSession) -> None:
+        """Abre uma página nova no mesmo contexto e fecha as demais (stealth e bloqueador são do contexto)."""
+        session.page = await session.context.new_page()
+        for page in list(session.context.pages):
+            if page is not session.page:
+                try:
+                    await page.close()
+                except Exception:
+                    pass
+        if self.memory is not None:
+            self.memory.page_recycles += 1
+
+    @property
+    def rotates_egress(self) -> bool:
+        """True se contextos novos saem por outro IP (dispensa a pausa longa entre sessões)."""
+        return self.identities is not None and self.identities.rotates_egress
+
+    async def release(self, session: PooledSession) -> None:
+        if session.identity is not None:
+            self.identities.release(session.identity, pages=session.pages, blocked=session.blocked)
+            session.identity = None
+        try:
+            await session.context.close()
+        except Exception:
+            pass
+
+    async def rotate(self, session: PooledSession, reason: str = "") -> PooledSession:
+        """Fecha o contexto atual e devolve o próximo (o navegador continua aberto)."""
+        self.rotations[reason] = self.rotations.get(reason, 0) + 1
+        await self.release(session)
+        if reason == "memória":
+            # Reservas ociosas de outras fases são a memória mais barata de liberar
+            dropped = await self.drop_spares(keep=session.key)
+            if dropped:
+                logger.info(f"🧠 {dropped} contexto(s) de reserva ocioso(s) fechado(s).")
+        return await self.acquire(session.factory, session.key)
+
+    def stats(self) -> str:
+        rot = ", ".join(f"{k}: {v}" for k, v in self.rotations.items()) or "nenhuma"
+        return f"🧭 Pool: {self.contexts_created} contextos criados, rotações ({rot})"
+
+    async def close(self) -> None:
+        await self.drop_spares()
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        logger.info(self.stats())
+        if self.memory is not None and self.memory.enabled:
+            self.memory.log_summary()
+        if self.identities is not None:
+            self.identities.log_summary()
@@ -0,0 +1,152 @@
+import logging
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Campos que descrevem o anúncio (o valor mais recente prevalece)
+ATRIBUTOS = [
+    "link", "nome_anunciante", "tipo_transacao", "endereco", "bairro", "municipio", "uf",
+    "metragem", "quartos", "banheiros", "suites", "vagas", "latitude", "longitude",
+]
+# Campos acompanhados no histórico (uma linha nova a cada mudança)
+PRECOS = ["preco_venda", "condominio", "iptu"]
+
+
+class ConsolidatedStore:
+    """Base única (SQLite) com todos os anúncios vistos em todas as execuções.
+
+    Chaveada pelo ID do anúncio: guarda a primeira e a última vez em que ele
+    apareceu, os atributos mais recentes e o histórico de preço (só as mudanças).
+    Os arquivos já ingeridos ficam registrados, então cada ingestão custa
+    apenas as linhas novas e não uma releitura do histórico.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        atributos = ", ".join(ATRIBUTOS)
+        self._conn.executescript(
+            f"CREATE TABLE IF NOT EXISTS anuncios ("
+            f" listing_id TEXT PRIMARY KEY, {atributos}, {', '.join(PRECOS)},"
+            f" first_seen TEXT NOT NULL, last_seen TEXT NOT NULL,"
+            f" ultima_execucao TEXT);"
+            "CREATE TABLE IF NOT EXISTS historico_precos ("
+            " listing_id TEXT NOT NULL, visto_em TEXT NOT NULL,"
+            " preco_venda INTEGER, condominio INTEGER, iptu INTEGER, execucao TEXT,"
+            " PRIMARY KEY (listing_id, visto_em));"
+            "CREATE TABLE IF NOT EXISTS arquivos_ingeridos ("
+            " origem TEXT PRIMARY KEY, versao TEXT, execucao TEXT, linhas INTEGER, ingerido_em REAL);"
+            "CREATE INDEX IF NOT EXISTS idx_anuncios_last_seen ON anuncios(last_seen);"
+            "CREATE INDEX IF NOT EXISTS idx_anuncios_first_seen ON anuncios(first_seen);"
+            "CREATE INDEX IF NOT EXISTS idx_historico_visto_em ON historico_precos(visto_em);"
+        )
+        self._conn.commit()
+
+    def ja_ingerido(self, origem: str, versao: Optional[str]) -> bool:
+        row = self._conn.execute("SELECT versao FROM arquivos_ingeridos WHERE origem = ?", (origem,)).fetchone()
+        return row is not None and row[0] == versao
+
+    def ingerir(self, registros: Iterable[Dict[str, Any]], origem: str, versao: Optional[str] = None, execucao: Optional[str] = None) -> int:
+        """Incorpora registros normalizados (``normalizar_registro``/``processar``).
+
+        Reingerir o mesmo arquivo (ex.: CSV que cresceu numa retomada) é
+        idempotente: as observações já gravadas não mudam nada.
+        """
+        linhas = sorted(
+            (r for r in registros if r.get("data_extracao") and (r.get("id_anuncio") or r.get("link"))),
+            key=lambda r: str(r["data_extracao"]),
+        )
+        cols_anuncio = ATRIBUTOS + PRECOS
+        placeholders = ", ".join("?" for _ in cols_anuncio)
+        # Atributos só são sobrescritos por observações mais novas que a última vista
+        updates = ", ".join(
+            f"{c} = CASE WHEN excluded.last_seen >= anuncios.last_seen THEN COALESCE(excluded.{c}, anuncios.{c}) ELSE anuncios.{c} END"
+            for c in cols_anuncio
+        )
+        upsert = (
+            f"INSERT INTO anuncios (listing_id, {', '.join(cols_anuncio)}, first_seen, last_seen, ultima_execucao)"
+            f" VALUES (?, {placeholders}, ?, ?, ?)"
+            f" ON CONFLICT(listing_id) DO UPDATE SET {updates},"
+            " first_seen = MIN(anuncios.first_seen, excluded.first_seen),"
+            " ultima_execucao = CASE WHEN excluded.last_seen >= anuncios.last_seen THEN excluded.ultima_execucao ELSE anuncios.ultima_execucao END,"
+            " last_seen = MAX(anuncios.last_seen, excluded.last_seen)"
+        )
+        # Só grava no histórico se o preço difere da observação anterior; campo
+        # ausente numa extração herda o valor anterior em vez de contar como mudança
+        historico = (
+            "INSERT OR IGNORE INTO historico_precos (listing_id, visto_em, preco_venda, condominio, iptu, execucao)"
+            " SELECT :id, :visto_em, COALESCE(:preco_venda, ant.preco_venda), COALESCE(:condominio, ant.condominio),"
+            " COALESCE(:iptu, ant.iptu), :execucao"
+            " FROM (SELECT 1) LEFT JOIN (SELECT preco_venda, condominio, iptu FROM historico_precos"
+            "  WHERE listing_id = :id AND visto_em <= :visto_em ORDER BY visto_em DESC LIMIT 1) AS ant"
+            " WHERE NOT (COALESCE(:preco_venda, ant.preco_venda) IS ant.preco_venda"
+            "  AND COALESCE(:condominio, ant.condominio) IS ant.condominio AND COALESCE(:iptu, ant.iptu) IS ant.iptu)"
+        )
+        with self._conn:
+            for r in linhas:
+                key = r.get("id_anuncio") or r["link"]
+                visto_em = str(r["data_extracao"])
+                precos = [r.get(c) for c in PRECOS]
+                self._conn.execute(upsert, (key, *[r.get(c) for c in cols_anuncio], visto_em, visto_em, execucao))
+                if any(p is not None for p in precos):
+                    self._conn.execute(historico, {"id": key, "visto_em": visto_em, "execucao": execucao, **dict(zip(PRECOS, precos))})
+            self._conn.execute(
+                "INSERT OR REPLACE INTO arquivos_ingeridos (origem, versao, execucao, linhas, ingerido_em) VALUES (?, ?, ?, ?, ?)",
+                (origem, versao, execucao, len(linhas), time.time()),
+            )
+        return len(linhas)
+
+    def _consulta(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        cur = self._conn.execute(sql, params)
+        cols = [d[0] for d in cur.description]
+        return [dict(zip(cols, row)) for row in cur.fetchall()]
+
+    def precos_alterados(self, desde: str) -> List[Dict[str, Any]]:
+        """Anúncios cujo preço (venda, condomínio ou IPTU) mudou a partir de ``desde``."""
+        return self._consulta(
+            "SELECT h.listing_id, a.link, a.bairro, h.visto_em AS alterado_em,"
+            " h.preco_anterior, h.preco_venda, h.condominio_anterior, h.condominio, h.iptu_anterior, h.iptu"
+            " FROM (SELECT *, LAG(preco_venda) OVER w AS preco_anterior, LAG(condominio) OVER w AS condominio_anterior,"
+            "  LAG(iptu) OVER w AS iptu_anterior, ROW_NUMBER() OVER w AS n"
+            "  FROM historico_precos WINDOW w AS (PARTITION BY listing_id ORDER BY visto_em)) AS h"
+            " JOIN anuncios a USING (listing_id)"
+            " WHERE h.n > 1 AND h.visto_em >= ?"
+            " AND (h.preco_venda IS NOT h.preco_anterior OR h.condominio IS NOT h.condominio_anterior OR h.iptu IS NOT h.iptu_anterior)"
+            " ORDER BY h.visto_em",
+            (desde,),
+        )
+
+    def novos(self, desde: str) -> List[Dict[str, Any]]:
+        """Anúncios vistos pela primeira vez a partir de ``desde``."""
+        return self._consulta("SELECT * FROM anuncios WHERE first_seen >= ? ORDER BY first_seen", (desde,))
+
+    def ausentes(self, desde: str) -> List[Dict[str, Any]]:
+        """Anúncios que não aparecem em nenhuma execução desde ``desde`` (provavelmente removidos)."""
+        return self._consulta("SELECT * FROM anuncios WHERE last_seen < ? ORDER BY last_seen", (desde,))
+
+    def historico(self, listing_id: str) -> List[Dict[str, Any]]:
+        return self._consulta("SELECT * FROM historico_precos WHERE listing_id = ? ORDER BY visto_em", (listing_id,))
+
+    def resumo(self) -> Dict[str, Any]:
+        anuncios, primeiro, ultimo = self._conn.execute("SELECT COUNT(*), MIN(first_seen), MAX(last_seen) FROM anuncios").fetchone()
+        return {
+            "anuncios": anuncios,
+            "observacoes_preco": self._conn.execute("SELECT COUNT(*) FROM historico_precos").fetchone()[0],
+            "arquivos": self._conn.execute("SELECT COUNT(*) FROM arquivos_ingeridos").fetchone()[0],
+            "primeiro_visto": primeiro,
+            "ultimo_visto": ultimo,
+        }
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM anuncios").fetchone()[0]
+
+    def close(self) -> None:
+        try:
+            self._conn.close()
+        except Exception:
+            pass
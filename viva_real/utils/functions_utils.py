@@ -1,3 +1,13 @@
+import re
+
+# Pré-compilados: parse_endereco roda uma vez por anúncio
+_DASH_SPLIT_RE = re.compile(r"\s*-\s*")
+_UF_RE = re.compile(r"[A-Za-z]{2}")
+_STREET_INDICATOR_RE = re.compile(r"\b(rua|r\.|avenida|av\.|av|praça|praca|travessa|alameda|rodovia|rod\.|estrada|largo|al\.|rua)\b", re.I)
+_DIGIT_RE = re.compile(r"\d")
+_TRAILING_NUMBER_RE = re.compile(r"^(.*?)[,\s]+(\d[\w/-]*)$")
+
+
 def parse_price_info(page):
     prices = {}
     items = page.locator("div.price-info__values div.value-item")
@@ -18,24 +28,20 @@ def parse_endereco(endereco: str) -> dict:
     Retorna um dicionário com chaves: logradouro, numero, bairro, municipio, uf.
     Valores ausentes serão retornados como None.
     """
-    import re
-
     if not endereco:
         return {"logradouro": None, "numero": None, "bairro": None, "municipio": None, "uf": None}
 
     s = endereco.strip()
     # split by dash groups (separador comum antes do bairro/municipio/UF)
-    parts = re.split(r"\s*-\s*", s)
+    parts = _DASH_SPLIT_RE.split(s)
 
     # detect UF (última parte com 2 letras)
     uf = None
-    if parts and re.fullmatch(r"[A-Za-z]{2}", parts[-1].strip()):
+    if parts and _UF_RE.fullmatch(parts[-1].strip()):
         uf = parts.pop(-1).strip().upper()
 
     logradouro = numero = bairro = municipio = None
 
-    street_indicator = re.compile(r"\b(rua|r\.|avenida|av\.|av|praça|praca|travessa|alameda|rodovia|rod\.|estrada|largo|al\.|rua)\b", re.I)
-
     # helper to clean tokens
     def _tokens(text: str):
         return [p.strip() for p in text.split(",") if p.strip()]
@@ -46,16 +52,16 @@ def parse_endereco(endereco: str) -> dict:
         second = parts[1].strip() if len(parts) >= 2 else None
 
         # Decide if 'first' is a street (contains street keywords or explicit number)
-        looks_like_street = bool(street_indicator.search(first)) or bool(re.search(r"\d", first))
+        looks_like_street = bool(_STREET_INDICATOR_RE.search(first)) or bool(_DIGIT_RE.search(first))
 
         if looks_like_street:
             # try to split "logradouro, numero" or trailing number
             t = _tokens(first)
-            if len(t) >= 2 and re.search(r"\d", t[-1]):
+            if len(t) >= 2 and _DIGIT_RE.search(t[-1]):
                 numero = t[-1]
                 logradouro = ", ".join(t[:-1])
             else:
-                m = re.match(r"^(.*?)[,\s]+(\d[\w/-]*)$", first)
+                m = _TRAILING_NUMBER_RE.match(first)
                 if m:
                     logradouro = m.group(1).strip()
                     numero = m.group(2).strip()
@@ -0,0 +1,24 @@
+from __future__ import annotations
+
+import logging
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from google.cloud import storage
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1)
+def get_client() -> storage.Client:
+    """Cliente GCS único por processo (a criação custa autenticação + discovery).
+
+    A biblioteca só é importada aqui: execuções sem ``--bucket`` não pagam o import.
+    """
+    from google.cloud import storage
+    return storage.Client()
+
+
+def get_bucket(bucket_name: str) -> storage.Bucket:
+    return get_client().bucket(bucket_name)
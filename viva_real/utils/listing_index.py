@@ -0,0 +1,108 @@
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Os links de anúncio terminam em ".../<slug>-id-2712345678/"; ancorado no fim do caminho
+# para não casar um "id-123" que apareça no slug ou na query
+LISTING_ID_RE = re.compile(r"^[^?#]*[-/]id-(\d+)/?(?:[?#].*)?$")
+_NON_DIGITS_RE = re.compile(r"\D")
+
+
+def extract_listing_id(url: str) -> Optional[str]:
+    """Extrai o ID numérico do anúncio a partir da URL (ou None se não houver)."""
+    if not url:
+        return None
+    m = LISTING_ID_RE.search(url)
+    return m.group(1) if m else None
+
+
+def card_fingerprint(preco: Optional[str], metragem: Optional[str], quartos: Optional[str]) -> Optional[str]:
+    """Resume preço/área/quartos num hash curto, ignorando formatação ("R$ 1.250.000" == "1250000")."""
+    parts = [_NON_DIGITS_RE.sub("", str(v or "")) for v in (preco, metragem, quartos)]
+    if not any(parts):
+        return None
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+class ListingIndex:
+    """Índice persistente (SQLite) dos anúncios já extraídos entre execuções.
+
+    Chaveado pelo ID do anúncio, guarda quando ele foi extraído pela última vez
+    e o fingerprint dos dados do card, para que ``scrape_batch`` pule anúncios
+    recentes (dentro do TTL) ou inalterados.
+    """
+
+    def __init__(self, db_path: str, ttl_hours: float = 24.0):
+        self.db_path = db_path
+        self.ttl_seconds = max(0.0, ttl_hours) * 3600
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._conn = sqlite3.connect(db_path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS anuncios ("
+            " listing_id TEXT PRIMARY KEY,"
+            " link TEXT NOT NULL,"
+            " fingerprint TEXT,"
+            " last_scraped REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def key(link: str) -> str:
+        return extract_listing_id(link) or link
+
+    def should_skip(self, link: str, fingerprint: Optional[str] = None) -> Optional[str]:
+        """Retorna o motivo para pular o anúncio ("recente"/"inalterado") ou None."""
+        row = self._conn.execute(
+            "SELECT fingerprint, last_scraped FROM anuncios WHERE listing_id = ?", (self.key(link),)
+        ).fetchone()
+        if row is None:
+            return None
+        stored_fp, last_scraped = row
+        if self.ttl_seconds and time.time() - last_scraped < self.ttl_seconds:
+            return "recente"
+        if fingerprint and stored_fp and fingerprint == stored_fp:
+            return "inalterado"
+        return None
+
+    def mark_scraped(self, link: str, fingerprint: Optional[str] = None) -> None:
+        self._conn.execute(
+            "INSERT INTO anuncios (listing_id, link, fingerprint, last_scraped) VALUES (?, ?, ?, ?)"
+            " ON CONFLICT(listing_id) DO UPDATE SET link = excluded.link,"
+            " fingerprint = COALESCE(excluded.fingerprint, anuncios.fingerprint),"
+            " last_scraped = excluded.last_scraped",
+            (self.key(link), link, fingerprint, time.time()),
+        )
+        self._conn.commit()
+
+    def merge_from(self, other_path: str) -> int:
+        """Incorpora outro índice (ex.: o de um shard), mantendo a extração mais recente de cada anúncio."""
+        self._conn.execute("ATTACH DATABASE ? AS outro", (other_path,))
+        try:
+            cur = self._conn.execute(
+                "INSERT INTO anuncios (listing_id, link, fingerprint, last_scraped)"
+                " SELECT listing_id, link, fingerprint, last_scraped FROM outro.anuncios WHERE true"
+                " ON CONFLICT(listing_id) DO UPDATE SET link = excluded.link,"
+                " fingerprint = COALESCE(excluded.fingerprint, anuncios.fingerprint),"
+                " last_scraped = excluded.last_scraped"
+                " WHERE excluded.last_scraped > anuncios.last_scraped"
+            )
+            self._conn.commit()
+            return cur.rowcount
+        finally:
+            self._conn.execute("DETACH DATABASE outro")
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM anuncios").fetchone()[0]
+
+    def close(self) -> None:
+        try:
+            self._conn.close()
+        except Exception:
+            pass
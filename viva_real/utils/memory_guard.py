@@ -0,0 +1,162 @@
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+CGROUP_LIMIT_FILES = ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes")
+
+# Sem --enable-precise-memory-info, performance.memory é arredondado e só muda a cada ~20 min
+PRECISE_MEMORY_ARG = "--enable-precise-memory-info"
+JS_HEAP_JS = "() => (performance.memory ? performance.memory.usedJSHeapSize : null)"
+
+
+def proc_tree(root: int) -> List[int]:
+    """PIDs do processo e descendentes (Chromium e seus renderers), lidos de /proc."""
+    children: Dict[int, List[int]] = {}
+    for name in os.listdir("/proc"):
+        if not name.isdigit():
+            continue
+        try:
+            with open(f"/proc/{name}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(name))
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack.extend(children.get(pid, []))
+    return tree
+
+
+def proc_usage(pid: int) -> Optional[tuple]:
+    """(RSS em bytes, CPU em segundos) de um processo."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return int(fields[21]) * PAGE_SIZE, (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def tree_rss(root: Optional[int] = None) -> Optional[int]:
+    """RSS somada do processo e descendentes; None sem /proc (macOS/Windows)."""
+    if not os.path.isdir("/proc"):
+        return None
+    return sum(u[0] for u in map(proc_usage, proc_tree(root or os.getpid())) if u)
+
+
+def cgroup_memory_limit() -> Optional[int]:
+    """Limite de memória do contêiner (cgroup v2 ou v1), se houver."""
+    for path in CGROUP_LIMIT_FILES:
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+        except OSError:
+            continue
+        if value.isdigit() and int(value) < 1 << 60: # v1 usa um número enorme para "sem limite"
+            return int(value)
+    return None
+
+
+class MemoryGuard:
+    """Limites de memória que decidem quando reciclar a página ou o contexto.
+
+    ``heap_limit_mb`` vale por página: acima dele, o ``BrowserPool`` troca a
+    página por uma nova no mesmo contexto (mantém cookies e aquecimento).
+    ``rss_limit_mb`` vale para o processo inteiro (Python + Chromium): acima
+    dele, um contexto por vez é renovado, com ``cooldown`` segundos entre
+    renovações para a memória liberada aparecer na medição. Sem
+    ``rss_limit_mb``, usa 75% do limite do contêiner (cgroup), se houver.
+    """
+
+    def __init__(self, rss_limit_mb: Optional[float] = None, heap_limit_mb: float = 256.0, check_every: int = 5, cooldown: float = 30.0, cache_seconds: float = 2.0):
+        if rss_limit_mb is None:
+            limit = cgroup_memory_limit()
+            rss_limit_mb = limit * 0.75 / 1e6 if limit else 0.0
+        self.rss_limit = rss_limit_mb * 1e6
+        self.heap_limit = heap_limit_mb * 1e6
+        self.check_every = max(1, check_every)
+        self.cooldown = cooldown
+        self.cache_seconds = cache_seconds
+        self.peak_rss = 0
+        self.peak_heap = 0
+        self.page_recycles = 0
+        self.context_rotations = 0
+        self._rss: Optional[int] = None
+        self._rss_at = 0.0
+        self._last_rotation = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.rss_limit or self.heap_limit)
+
+    def rss(self) -> Optional[int]:
+        now = time.monotonic()
+        if now - self._rss_at >= self.cache_seconds:
+            self._rss = tree_rss()
+            self._rss_at = now
+            if self._rss:
+                self.peak_rss = max(self.peak_rss, self._rss)
+        return self._rss
+
+    def should_rotate(self) -> bool:
+        """True para um único chamador quando a RSS passa do limite (os demais esperam o ``cooldown``)."""
+        if not self.rss_limit or time.monotonic() - self._last_rotation < self.cooldown:
+            return False
+        rss = self.rss()
+        if rss is None or rss < self.rss_limit:
+            return False
+        self._last_rotation = time.monotonic()
+        self._rss_at = 0.0 # Mede de novo depois da renovação
+        self.context_rotations += 1
+        logger.info(f"🧠 Memória do processo em {rss / 1e6:.0f} MB (limite {self.rss_limit / 1e6:.0f} MB): renovando um contexto.")
+        return True
+
+    def due(self, pages: int) -> bool:
+        return bool(self.heap_limit) and pages > 0 and pages % self.check_every == 0
+
+    async def _cdp_heap(self, page) -> Optional[int]:
+        """``JSHeapUsedSize`` do CDP (``Performance.getMetrics``): medido na hora, sem arredondamento."""
+        cdp = await page.context.new_cdp_session(page)
+        try:
+            await cdp.send("Performance.enable")
+            metrics = await cdp.send("Performance.getMetrics")
+        finally:
+            await cdp.detach()
+        return next((int(m["value"]) for m in metrics.get("metrics", []) if m.get("name") == "JSHeapUsedSize"), None)
+
+    async def heap(self, page) -> Optional[int]:
+        """Heap JS usada pela página (CDP; ``performance.memory`` como alternativa, só no Chromium)."""
+        try:
+            value = await self._cdp_heap(page)
+        except Exception:
+            value = None
+        if value is None:
+            try:
+                value = await page.evaluate(JS_HEAP_JS)
+            except Exception:
+                return None
+        if value:
+            self.peak_heap = max(self.peak_heap, value)
+        return value
+
+    async def page_over_limit(self, page) -> bool:
+        value = await self.heap(page)
+        return bool(self.heap_limit and value and value >= self.heap_limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rss_mb": round((self._rss or 0) / 1e6, 1), "rss_pico_mb": round(self.peak_rss / 1e6, 1),
+            "heap_pico_mb": round(self.peak_heap / 1e6, 1), "paginas_recicladas": self.page_recycles,
+            "contextos_renovados": self.context_rotations,
+        }
+
+    def log_summary(self) -> None:
+        s = self.stats()
+        logger.info(f"🧠 Memória: pico {s['rss_pico_mb']} MB (processo), {s['heap_pico_mb']} MB (heap de página); {s['paginas_recicladas']} páginas recicladas, {s['contextos_renovados']} contextos renovados por memória.")
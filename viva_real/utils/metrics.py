@@ -0,0 +1,240 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Limites (s) dos buckets dos histogramas de etapa
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+RESERVOIR_SIZE = 5000
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Histogram:
+    """Histograma de latência: buckets cumulativos (Prometheus) + amostra para percentis."""
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+        self._sample: List[float] = []
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.buckets[i] += 1
+        # Amostragem de reservatório: memória constante em execuções longas
+        if len(self._sample) < RESERVOIR_SIZE:
+            self._sample.append(value)
+        else:
+            j = random.randrange(self.count)
+            if j < RESERVOIR_SIZE:
+                self._sample[j] = value
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self._sample:
+            return None
+        ordered = sorted(self._sample)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "total_s": round(self.sum, 3),
+            "media_s": round(self.sum / self.count, 4),
+            "min_s": round(self.min, 4),
+            "p50_s": round(self.quantile(0.5), 4),
+            "p95_s": round(self.quantile(0.95), 4),
+            "max_s": round(self.max, 4),
+        }
+
+
+class _Window:
+    """Conjunto de histogramas/contadores de um período (execução inteira ou um lote)."""
+
+    def __init__(self):
+        self.started = time.time()
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Dict[Tuple[str, LabelKey], float] = {}
+
+    def observe(self, stage: str, seconds: float) -> None:
+        self.stages.setdefault(stage, Histogram()).observe(seconds)
+
+    def inc(self, name: str, value: float, labels: LabelKey) -> None:
+        key = (name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def to_dict(self) -> Dict[str, Any]:
+        counters: Dict[str, Any] = {}
+        for (name, labels), value in sorted(self.counters.items()):
+            label = ",".join(f"{k}={v}" for k, v in labels)
+            counters[f"{name}{{{label}}}" if label else name] = value
+        return {
+            "inicio": datetime.fromtimestamp(self.started).strftime("%Y-%m-%d %H:%M:%S"),
+            "duracao_s": round(time.time() - self.started, 1),
+            "etapas": {k: h.summary() for k, h in sorted(self.stages.items())},
+            "contadores": counters,
+        }
+
+
+class RunMetrics:
+    """Instrumentação da execução: latência por etapa, contadores e bytes.
+
+    ``stage()`` cronometra um trecho (inclusive com ``await`` dentro); ``inc()``
+    soma contadores com rótulos. A cada ``batch_every`` anúncios (``tick()``) o
+    resumo do lote é acrescentado a ``<dados>.metricas.jsonl``; no fim,
+    ``write_summary()`` grava o resumo da execução em ``<dados>.metricas.json``.
+    Coletores registrados (ex.: bytes do ``ResourceBlocker``) entram nos dois.
+    """
+
+    def __init__(self, base_path: Optional[str] = None, batch_every: int = 50, prefix: str = "vivareal"):
+        self.base_path = base_path
+        self.batch_every = max(1, batch_every)
+        self.prefix = prefix
+        self.run = _Window()
+        self.batch = _Window()
+        self.batches = 0
+        self._ticks = 0
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.on_write: Optional[Callable[[str], None]] = None # ex.: agenda upload do arquivo
+
+    @property
+    def summary_path(self) -> Optional[str]:
+        return f"{self.base_path}.metricas.json" if self.base_path else None
+
+    @property
+    def batches_path(self) -> Optional[str]:
+        return f"{self.base_path}.metricas.jsonl" if self.base_path else None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, time.monotonic() - started)
+
+    def observe(self, name: str, seconds: float) -> None:
+        self.run.observe(name, seconds)
+        self.batch.observe(name, seconds)
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        key = _labels(labels)
+        self.run.inc(name, value, key)
+        self.batch.inc(name, value, key)
+
+    def add_collector(self, name: str, fn: Callable[[], Dict[str, Any]]) -> None:
+        self._collectors[name] = fn
+
+    def _collect(self) -> Dict[str, Any]:
+        out = {}
+        for name, fn in self._collectors.items():
+            try:
+                out[name] = fn()
+            except Exception as e:
+                out[name] = {"erro": str(e)}
+        return out
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**self.run.to_dict(), "lotes": self.batches, "coletores": self._collect()}
+
+    def tick(self) -> None:
+        """Conta um anúncio processado; fecha o lote a cada ``batch_every``."""
+        self._ticks += 1
+        if self._ticks % self.batch_every == 0:
+            self.flush_batch()
+
+    def flush_batch(self) -> None:
+        if not self.batch.stages and not self.batch.counters:
+            return
+        self.batches += 1
+        entry = {"lote": self.batches, **self.batch.to_dict(), "coletores": self._collect()}
+        self.batch = _Window()
+        if self.batches_path:
+            with open(self.batches_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            if self.on_write:
+                self.on_write(self.batches_path)
+
+    def write_summary(self) -> Optional[str]:
+        self.flush_batch()
+        data = self.snapshot()
+        self.log_summary(data)
+        if not self.summary_path:
+            return None
+        os.makedirs(os.path.dirname(self.summary_path) or ".", exist_ok=True)
+        with open(self.summary_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        if self.on_write:
+            self.on_write(self.summary_path)
+        return self.summary_path
+
+    def log_summary(self, data: Optional[Dict[str, Any]] = None) -> None:
+        data = data or self.snapshot()
+        etapas = sorted(data["etapas"].items(), key=lambda kv: kv[1].get("total_s", 0), reverse=True)
+        partes = [f"{k} {v['total_s']:.1f}s (p50 {v['p50_s']:.2f}s, p95 {v['p95_s']:.2f}s)" for k, v in etapas if v.get("count")]
+        if partes:
+            logger.info("⏱️ Tempo por etapa: " + " | ".join(partes))
+
+    # --- Exposição estilo Prometheus -------------------------------------------------
+
+    def prometheus_text(self) -> str:
+        p = self.prefix
+        lines = [f"# TYPE {p}_stage_seconds histogram"]
+        for stage, h in sorted(self.run.stages.items()):
+            for bound, count in zip(BUCKETS, h.buckets):
+                lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+            lines.append(f'{p}_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {h.count}')
+            lines.append(f'{p}_stage_seconds_sum{{stage="{stage}"}} {h.sum:.6f}')
+            lines.append(f'{p}_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        names = sorted({name for name, _ in self.run.counters})
+        for name in names:
+            lines.append(f"# TYPE {p}_{name}_total counter")
+            for (n, labels), value in sorted(self.run.counters.items()):
+                if n == name:
+                    label = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{p}_{name}_total{{{label}}} {value}" if label else f"{p}_{name}_total {value}")
+        for coletor, values in self._collect().items():
+            for key, value in values.items():
+                if isinstance(value, (int, float)):
+                    lines.append(f'{p}_{coletor}{{campo="{key}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            await reader.readline()
+            body = self.prometheus_text().encode()
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n" + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, port: int, host: str = "127.0.0.1") -> None:
+        self._server = await asyncio.start_server(self._handle, host, port)
+        logger.info(f"📡 Métricas em http://{host}:{port}/metrics")
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
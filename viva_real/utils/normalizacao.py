@@ -0,0 +1,100 @@
+import json
+import re
+from ast import literal_eval
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from viva_real.utils.listing_index import extract_listing_id
+
+# Número no formato brasileiro: "R$ 1.250.000", "1.250,50", "85 m²", "85-120 m²" (primeiro número)
+VALOR_RE = re.compile(r"(\d{1,3}(?:\.\d{3})+|\d+)(?:,(\d+))?")
+INT_RE = re.compile(r"(\d+)")
+
+
+def parse_valor_reais(texto: Optional[str]) -> Optional[int]:
+    if not texto:
+        return None
+    m = VALOR_RE.search(str(texto))
+    return int(m.group(1).replace(".", "")) if m else None
+
+
+def parse_area(texto: Optional[str]) -> Optional[float]:
+    if not texto:
+        return None
+    m = VALOR_RE.search(str(texto))
+    if not m:
+        return None
+    inteiro = m.group(1).replace(".", "")
+    return float(f"{inteiro}.{m.group(2)}" if m.group(2) else inteiro)
+
+
+def parse_inteiro(texto: Optional[str]) -> Optional[int]:
+    if texto is None or texto == "":
+        return None
+    if isinstance(texto, int):
+        return texto
+    m = INT_RE.search(str(texto))
+    return int(m.group(1)) if m else None
+
+
+def parse_float(valor: Any) -> Optional[float]:
+    try:
+        return float(valor) if valor not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_lista(valor: Any) -> List[str]:
+    """Aceita lista, JSON, repr de lista Python ou texto separado por "; "."""
+    if valor is None or valor == "":
+        return []
+    if isinstance(valor, (list, tuple)):
+        return [str(v) for v in valor]
+    texto = str(valor).strip().strip('"')
+    if texto.startswith("["):
+        for loader in (json.loads, literal_eval):
+            try:
+                return [str(v) for v in loader(texto)]
+            except (ValueError, SyntaxError):
+                continue
+    return [p.strip() for p in texto.split(";") if p.strip()]
+
+
+def parse_data(valor: Any) -> Optional[datetime]:
+    if isinstance(valor, datetime):
+        return valor
+    try:
+        return datetime.strptime(str(valor), "%Y-%m-%d %H:%M:%S")
+    except (TypeError, ValueError):
+        return None
+
+
+def normalizar_registro(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Converte um registro do scraper (textos de exibição) para tipos fixos."""
+    return {
+        "id_anuncio": extract_listing_id(row.get("link") or ""),
+        "nome_anunciante": row.get("nome_anunciante") or None,
+        "tipo_transacao": row.get("tipo_transacao") or None,
+        "preco_venda": parse_valor_reais(row.get("preco_venda")),
+        "endereco": row.get("endereco") or None,
+        "logradouro": row.get("logradouro") or None,
+        "numero": row.get("numero") or None,
+        "bairro": row.get("bairro") or None,
+        "municipio": row.get("municipio") or None,
+        "uf": row.get("uf") or None,
+        "metragem": parse_area(row.get("metragem")),
+        "quartos": parse_inteiro(row.get("quartos")),
+        "banheiros": parse_inteiro(row.get("banheiros")),
+        "suites": parse_inteiro(row.get("suites")),
+        "vagas": parse_inteiro(row.get("vagas")),
+        "outros": parse_lista(row.get("outros")),
+        "caracteristicas": parse_lista(row.get("caracteristicas")),
+        "latitude": parse_float(row.get("latitude")),
+        "longitude": parse_float(row.get("longitude")),
+        "condominio": parse_valor_reais(row.get("condominio")),
+        "iptu": parse_valor_reais(row.get("iptu")),
+        "qtd_imagens": parse_inteiro(row.get("qtd_imagens")),
+        "urls_imagens": parse_lista(row.get("urls_imagens")),
+        "data_extracao": parse_data(row.get("data_extracao")),
+        "link": row.get("link") or None,
+    }
@@ -0,0 +1,56 @@
+from typing import Optional
+
+from viva_real.utils.listing_index import extract_listing_id
+
+# Resultado de cada tentativa de extração de um anúncio
+OK = "ok"
+BLOQUEIO = "bloqueio"        # desafio/captcha ou status de bloqueio
+REMOVIDO = "removido"        # 404/410 ou anúncio fora do ar
+TIMEOUT = "timeout"
+FALHA_PARSE = "falha_parse"  # página carregou, mas sem os campos do anúncio
+ERRO = "erro"                # qualquer outra exceção
+
+FINAL_OUTCOMES = {OK, REMOVIDO}
+RETRYABLE_OUTCOMES = {BLOQUEIO, TIMEOUT, FALHA_PARSE, ERRO}
+
+# Trechos que indicam página de desafio/bloqueio em vez do anúncio. Scripts de
+# proteção que rodam em toda página normal (sensores) não entram aqui.
+BLOCK_MARKERS = (
+    "px-captcha", "captcha-delivery.com", "cf-chl-", "just a moment...",
+    "access denied", "acesso negado", "request unsuccessful", "are you a robot",
+)
+BLOCK_STATUSES = {401, 403, 407, 429, 503}
+REMOVED_STATUSES = {404, 410}
+REMOVED_MARKERS = (
+    "não está mais disponível", "nao esta mais disponivel", "anúncio não encontrado",
+    "imóvel não encontrado", "página não encontrada", "este anúncio foi removido",
+)
+
+
+def is_blocked(status: Optional[int], html: str) -> bool:
+    """Detecta resposta de bloqueio/desafio (status típico ou marcadores no HTML)."""
+    if status in BLOCK_STATUSES:
+        return True
+    head = (html or "")[:20000].lower()
+    return any(marker in head for marker in BLOCK_MARKERS)
+
+
+def is_removed(status: Optional[int], html: str, final_url: Optional[str] = None, link: Optional[str] = None) -> bool:
+    """404/410, texto de anúncio indisponível ou redirecionamento para fora do anúncio."""
+    if status in REMOVED_STATUSES:
+        return True
+    if link and final_url:
+        wanted = extract_listing_id(link)
+        if wanted and extract_listing_id(final_url) != wanted:
+            return True
+    text = (html or "").lower()
+    return any(marker in text for marker in REMOVED_MARKERS)
+
+
+def classify_empty_page(status: Optional[int], html: str, final_url: Optional[str] = None, link: Optional[str] = None) -> str:
+    """Motivo de uma página que carregou sem os dados do anúncio."""
+    if is_blocked(status, html):
+        return BLOQUEIO
+    if is_removed(status, html, final_url, link):
+        return REMOVIDO
+    return FALHA_PARSE
@@ -0,0 +1,80 @@
+import json
+import os
+from datetime import datetime
+from typing import Dict, Iterable, List
+
+# Status considerados concluídos: não são refeitos num --resume (removido = anúncio fora do ar)
+DONE_STATUSES = {"ok", "removido"}
+
+
+class ProgressJournal:
+    """Diário de progresso durável gravado ao lado do CSV de saída.
+
+    ``<csv>.links.txt`` guarda o plano (links na ordem em que serão processados)
+    e ``<csv>.progresso.jsonl`` recebe uma linha por link finalizado, com
+    flush + fsync, para sobreviver a crash, preempção ou timeout.
+    """
+
+    def __init__(self, csv_path: str):
+        base = os.path.splitext(csv_path)[0]
+        self.plan_path = f"{base}.links.txt"
+        self.path = f"{base}.progresso.jsonl"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._status = self._load()
+        self._planned = set(self.load_plan())
+
+    def _load(self) -> Dict[str, str]:
+        status: Dict[str, str] = {}
+        if not os.path.exists(self.path):
+            return status
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    status[entry["link"]] = entry["status"] # Última ocorrência vence
+                except (ValueError, KeyError):
+                    continue # Linha truncada por queda no meio da escrita
+        return status
+
+    def load_plan(self) -> List[str]:
+        if not os.path.exists(self.plan_path):
+            return []
+        with open(self.plan_path, "r", encoding="utf-8") as f:
+            return list(dict.fromkeys(l.strip() for l in f if l.strip()))
+
+    def save_plan(self, links: Iterable[str]) -> None:
+        links = list(links)
+        with open(self.plan_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{l}\n" for l in links)
+            f.flush()
+            os.fsync(f.fileno())
+        self._planned = set(links)
+
+    def add_to_plan(self, link: str) -> None:
+        """Acrescenta um link ao plano (usado no modo streaming)."""
+        if link in self._planned:
+            return
+        self._planned.add(link)
+        with open(self.plan_path, "a", encoding="utf-8") as f:
+            f.write(f"{link}\n")
+
+    def record(self, link: str, status: str) -> None:
+        self._status[link] = status
+        entry = {"link": link, "status": status, "ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def is_done(self, link: str) -> bool:
+        return self._status.get(link) in DONE_STATUSES
+
+    def pending(self, links: Iterable[str]) -> List[str]:
+        """Links ainda não concluídos (nunca tentados ou que falharam)."""
+        return [l for l in links if not self.is_done(l)]
+
+    def summary(self) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for status in self._status.values():
+            counts[status] = counts.get(status, 0) + 1
+        return counts
@@ -0,0 +1,134 @@
+"""Proxy HTTP mínimo para testar o pool de identidades localmente.
+
+Encaminha requisições HTTP comuns e túneis ``CONNECT`` (HTTPS), contando o
+tráfego. Com ``block_after``, passa a responder 403/429 depois de N
+requisições, simulando um IP "queimado". Uso::
+
+    python -m viva_real.utils.proxy_stub --portas 8801,8802 --bloquear-apos 40
+    python main.py --proxies http://127.0.0.1:8801,http://127.0.0.1:8802
+"""
+import asyncio
+import logging
+from typing import List, Optional, Tuple
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+
+class ProxyStub:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, block_after: Optional[int] = None, block_status: int = 403):
+        self.host = host
+        self.port = port
+        self.block_after = block_after
+        self.block_status = block_status
+        self.requests = 0
+        self.blocked = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> "ProxyStub":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "ProxyStub":
+        return await self.start()
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    @staticmethod
+    async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while data := await reader.read(65536):
+                writer.write(data)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+    async def _read_head(self, reader: asyncio.StreamReader) -> Tuple[str, List[bytes]]:
+        request_line = (await reader.readline()).decode("latin-1").strip()
+        headers = []
+        while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+            headers.append(line)
+        return request_line, headers
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line, headers = await self._read_head(reader)
+            if not request_line:
+                writer.close()
+                return
+            method, target, version = request_line.split(" ", 2)
+            self.requests += 1
+
+            if self.block_after is not None and self.requests > self.block_after:
+                self.blocked += 1
+                writer.write(f"{version} {self.block_status} Blocked\r\nContent-Length: 0\r\nConnection: close\r\n\r\n".encode())
+                await writer.drain()
+                writer.close()
+                return
+
+            if method == "CONNECT":
+                host, _, port = target.rpartition(":")
+                up_reader, up_writer = await asyncio.open_connection(host, int(port or 443))
+                writer.write(f"{version} 200 Connection Established\r\n\r\n".encode())
+                await writer.drain()
+            else:
+                parts = urlsplit(target)
+                up_reader, up_writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+                path = parts.path or "/"
+                if parts.query:
+                    path += f"?{parts.query}"
+                kept = [h for h in headers if not h.lower().startswith((b"proxy-", b"connection:"))]
+                up_writer.write(f"{method} {path} {version}\r\n".encode() + b"".join(kept) + b"Connection: close\r\n\r\n")
+                await up_writer.drain()
+
+            await asyncio.gather(self._pipe(reader, up_writer), self._pipe(up_reader, writer))
+        except Exception as e:
+            logger.debug(f"Proxy stub: {e}")
+            try:
+                writer.close()
+            except Exception:
+                pass
+
+
+if __name__ == "__main__":
+    import argparse
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    parser = argparse.ArgumentParser(description="Proxy HTTP local para testes do pool de identidades")
+    parser.add_argument("--portas", default="8801", help="Portas separadas por vírgula (um proxy por porta)")
+    parser.add_argument("--bloquear-apos", type=int, help="Responde com bloqueio depois de N requisições por proxy")
+    parser.add_argument("--status-bloqueio", type=int, default=403)
+    args = parser.parse_args()
+
+    async def _main() -> None:
+        stubs = [await ProxyStub(port=int(p), block_after=args.bloquear_apos, block_status=args.status_bloqueio).start() for p in args.portas.split(",")]
+        logger.info(f"🧪 Proxies ativos: {', '.join(s.url for s in stubs)}")
+        try:
+            while True:
+                await asyncio.sleep(30)
+                logger.info(" | ".join(f"{s.port}: {s.requests} req, {s.blocked} bloqueadas" for s in stubs))
+        finally:
+            for s in stubs:
+                await s.close()
+
+    try:
+        asyncio.run(_main())
+    except KeyboardInterrupt:
+        pass
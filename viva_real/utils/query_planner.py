@@ -0,0 +1,83 @@
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+# Limites das faixas (None = sem limite). Mais pontos onde há mais anúncios
+PRICE_BREAKS: List[Optional[int]] = [
+    0, 150_000, 200_000, 250_000, 300_000, 350_000, 400_000, 450_000, 500_000, 600_000, 700_000, 800_000,
+    900_000, 1_000_000, 1_200_000, 1_400_000, 1_600_000, 1_800_000, 2_000_000, 2_500_000, 3_000_000,
+    3_500_000, 4_000_000, 5_000_000, 6_000_000, 8_000_000, 10_000_000, 15_000_000, 20_000_000, None,
+]
+AREA_BREAKS: List[Optional[int]] = [0, 30, 40, 50, 60, 70, 80, 90, 100, 120, 140, 160, 200, 250, 300, 400, 500, None]
+
+PRICE_PARAMS = ("precoMinimo", "precoMaximo")
+AREA_PARAMS = ("areaMinima", "areaMaxima")
+
+
+class SearchQuery:
+    """Sub-busca por faixa de preço e de área, guardadas como índices em ``PRICE_BREAKS``/``AREA_BREAKS``.
+
+    ``split`` divide a faixa de preço ao meio (em pontos de corte) e, quando
+    ela não tem mais como ser dividida, a de área. Os limites são inclusivos
+    no site, então um anúncio exatamente no corte aparece nas duas metades
+    (e sai na deduplicação por link).
+    """
+
+    def __init__(self, price: Tuple[int, int] = (0, len(PRICE_BREAKS) - 1), area: Tuple[int, int] = (0, len(AREA_BREAKS) - 1), depth: int = 0):
+        self.price = price
+        self.area = area
+        self.depth = depth
+
+    @property
+    def splittable(self) -> bool:
+        return self.price[1] - self.price[0] > 1 or self.area[1] - self.area[0] > 1
+
+    def split(self) -> List["SearchQuery"]:
+        lo, hi = self.price
+        if hi - lo > 1:
+            mid = (lo + hi) // 2
+            return [SearchQuery((lo, mid), self.area, self.depth + 1), SearchQuery((mid, hi), self.area, self.depth + 1)]
+        lo, hi = self.area
+        if hi - lo > 1:
+            mid = (lo + hi) // 2
+            return [SearchQuery(self.price, (lo, mid), self.depth + 1), SearchQuery(self.price, (mid, hi), self.depth + 1)]
+        return [self]
+
+    @staticmethod
+    def _bounds(breaks: List[Optional[int]], span: Tuple[int, int]) -> Tuple[Optional[int], Optional[int]]:
+        return breaks[span[0]] or None, breaks[span[1]]
+
+    def params(self) -> Dict[str, str]:
+        params = {}
+        for names, breaks, span in ((PRICE_PARAMS, PRICE_BREAKS, self.price), (AREA_PARAMS, AREA_BREAKS, self.area)):
+            for name, value in zip(names, self._bounds(breaks, span)):
+                if value is not None:
+                    params[name] = str(value)
+        return params
+
+    def apply(self, url: str) -> str:
+        """``url`` com os filtros da faixa (substitui filtros de preço/área que já estiverem nela)."""
+        parsed = urlparse(url)
+        qs = dict(parse_qsl(parsed.query))
+        for name in PRICE_PARAMS + AREA_PARAMS:
+            qs.pop(name, None)
+        qs.update(self.params())
+        return urlunparse((parsed.scheme, parsed.netloc, parsed.path, parsed.params, urlencode(qs, doseq=True), parsed.fragment))
+
+    @property
+    def label(self) -> str:
+        """Sufixo para o nome do arquivo de links (vazio para a busca inteira)."""
+        parts = []
+        for name, breaks, span in (("preco", PRICE_BREAKS, self.price), ("area", AREA_BREAKS, self.area)):
+            lo, hi = self._bounds(breaks, span)
+            if lo is not None or hi is not None:
+                parts.append(f"{name}-{lo or 0}-{hi if hi is not None else 'max'}")
+        return "".join(f"_{p}" for p in parts)
+
+    def __str__(self) -> str:
+        def fmt(breaks, span, unit):
+            lo, hi = self._bounds(breaks, span)
+            if lo is None and hi is None:
+                return None
+            return f"{unit}{lo or 0:,}–{f'{hi:,}' if hi is not None else '∞'}".replace(",", ".")
+        parts = [p for p in (fmt(PRICE_BREAKS, self.price, "R$ "), fmt(AREA_BREAKS, self.area, "m² ")) if p]
+        return ", ".join(parts) or "busca inteira"
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import random
+from typing import Optional
+
+from viva_real.utils.outcome import BLOCK_STATUSES
+
+logger = logging.getLogger(__name__)
+
+
+class AdaptiveRateController:
+    """Ritmo adaptativo (AIMD) para as pausas entre requisições.
+
+    A taxa sobe de forma aditiva a cada sucesso e cai de forma multiplicativa
+    a cada falha (mais forte em bloqueios). Cada worker chama ``wait()`` após
+    cada página, então o intervalo vale por worker; o estado (saúde do site) é
+    compartilhado entre eles.
+    """
+
+    def __init__(
+        self,
+        base_delay: float = 5.0,
+        min_delay: float = 1.0,
+        max_delay: float = 60.0,
+        increase: float = 0.02,
+        decrease_factor: float = 0.5,
+        block_factor: float = 0.25,
+        latency_limit: float = 10.0,
+        jitter: float = 0.3,
+        name: str = "",
+    ):
+        self.base_delay = base_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.increase = increase
+        self.decrease_factor = decrease_factor
+        self.block_factor = block_factor
+        self.latency_limit = latency_limit
+        self.jitter = jitter
+        self.name = name
+        self.rate = 1.0 / base_delay if base_delay > 0 else float("inf")
+        self.successes = 0
+        self.failures = 0
+        self.failures_since_pause = 0
+        self._events = 0
+
+    @classmethod
+    def disabled(cls, name: str = "") -> "AdaptiveRateController":
+        """Controlador sem pausas (benchmarks e testes locais)."""
+        return cls(base_delay=0, min_delay=0, max_delay=0, jitter=0, name=name)
+
+    @property
+    def delay(self) -> float:
+        if self.max_delay <= 0:
+            return 0.0
+        return min(self.max_delay, max(self.min_delay, 1.0 / self.rate))
+
+    def _clamp(self) -> None:
+        if self.max_delay <= 0:
+            return
+        self.rate = min(1.0 / max(self.min_delay, 1e-6), max(1.0 / self.max_delay, self.rate))
+
+    def status(self) -> str:
+        label = f" {self.name}" if self.name else ""
+        return f"📈 Ritmo{label}: {1.0 / self.delay if self.delay else float('inf'):.2f} req/s por worker (intervalo {self.delay:.1f}s, {self.successes} ok / {self.failures} falhas)"
+
+    def _log(self, force: bool = False) -> None:
+        self._events += 1
+        if force or self._events % 10 == 0:
+            logger.info(self.status())
+
+    def on_success(self, latency: Optional[float] = None) -> None:
+        self.successes += 1
+        if latency is not None and latency > self.latency_limit:
+            # Site respondendo devagar: recua de leve em vez de acelerar
+            self.rate *= 0.8
+        else:
+            self.rate += self.increase
+        self._clamp()
+        self._log()
+
+    def on_failure(self, kind: str = "erro", status: Optional[int] = None) -> None:
+        """Registra falha. ``kind`` "bloqueio" (ou status 403/429/503) recua mais forte."""
+        self.failures += 1
+        self.failures_since_pause += 1
+        blocked = kind == "bloqueio" or status in BLOCK_STATUSES
+        self.rate *= self.block_factor if blocked else self.decrease_factor
+        self._clamp()
+        logger.info(f"⚠️ Falha ({kind}{f', status {status}' if status else ''}): reduzindo ritmo.")
+        self._log(force=True)
+
+    def scaled(self, seconds: float) -> float:
+        """Escala uma pausa fixa pela pressão atual (intervalo atual / intervalo base)."""
+        if self.base_delay <= 0 or self.max_delay <= 0:
+            return 0.0
+        return seconds * min(2.0, max(0.2, self.delay / self.base_delay))
+
+    async def wait(self) -> None:
+        delay = self.delay
+        if delay > 0:
+            await asyncio.sleep(delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    async def session_pause(self, low: float = 20, high: float = 40) -> None:
+        """Pausa entre sessões: longa só se houve falhas desde a última, senão um intervalo normal."""
+        if self.failures_since_pause and self.max_delay > 0:
+            pause = min(self.max_delay, random.uniform(low, high) * min(3, self.failures_since_pause))
+            logger.info(f"💤 {self.failures_since_pause} falha(s) na sessão anterior: pausa de {pause:.0f}s.")
+            await asyncio.sleep(pause)
+        else:
+            await self.wait()
+        self.failures_since_pause = 0
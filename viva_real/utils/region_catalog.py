@@ -0,0 +1,107 @@
+import heapq
+import json
+import logging
+import os
+import unicodedata
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import quote_plus
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "regioes_sp.json")
+BASE_URL = "https://www.vivareal.com.br"
+
+
+def _ascii(texto: str) -> str:
+    return unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode("ascii")
+
+
+class Region:
+    """Bairro/distrito do catálogo: slug da URL, zona, coordenadas, prioridade e volume esperado de anúncios."""
+
+    def __init__(self, slug: str, nome: str, zona: str, lat: float, lon: float, prioridade: int = 3, volume: int = 0, url: Optional[str] = None, catalog: Optional["RegionCatalog"] = None):
+        self.slug = slug
+        self.nome = nome
+        self.zona = zona
+        self.lat = lat
+        self.lon = lon
+        self.prioridade = prioridade
+        self.volume = volume
+        self.url = url # Opcional: URL copiada do site, quando o contexto gerado não bate
+        self.catalog = catalog
+
+    def search_url(self, transacao: str = "venda") -> str:
+        """URL de busca com o contexto geográfico (``onde``) que os filtros e a ordenação exigem."""
+        if self.url:
+            return self.url
+        c = self.catalog
+        zona_nome = c.zonas.get(self.zona, self.zona)
+        onde = (
+            f",{c.estado},{c.cidade},{zona_nome},{self.nome},,,neighborhood,"
+            f"BR>{_ascii(c.estado)}>NULL>{_ascii(c.cidade)}>{zona_nome}>{self.nome},{self.lat},{self.lon},"
+        )
+        return f"{BASE_URL}/{transacao}/{c.uf}/{c.cidade_slug}/{self.zona}/{self.slug}/?transacao={transacao}&onde={quote_plus(onde)}"
+
+    def __repr__(self) -> str:
+        return f"Region({self.slug})"
+
+
+class RegionCatalog:
+    """Catálogo de regiões lido de JSON (padrão: ``viva_real/regioes_sp.json``).
+
+    Cobrir um bairro novo é só acrescentar uma linha em ``regioes``; ``volume``
+    (anúncios esperados) orienta a distribuição entre workers e shards.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self.cidade = data["cidade"]
+        self.estado = data.get("estado", data["cidade"])
+        self.uf = data["uf"]
+        self.cidade_slug = data["cidade_slug"]
+        self.zonas: Dict[str, str] = data.get("zonas", {})
+        self.regions = [Region(catalog=self, **r) for r in data["regioes"]]
+        self._by_slug = {r.slug: r for r in self.regions}
+
+    @classmethod
+    def load(cls, path: Optional[str] = None) -> "RegionCatalog":
+        with open(path or DEFAULT_CATALOG, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def get(self, slug: str) -> Region:
+        try:
+            return self._by_slug[slug]
+        except KeyError:
+            raise ValueError(f"Região desconhecida: {slug!r}") from None
+
+    def select(self, slugs: Optional[Iterable[str]] = None, max_priority: Optional[int] = None, zonas: Optional[Iterable[str]] = None) -> List[Region]:
+        """Regiões pelos slugs (na ordem dada) ou filtradas por prioridade máxima e zonas."""
+        if slugs:
+            return [self.get(s) for s in slugs]
+        zonas = set(zonas or [])
+        return [
+            r for r in self.regions
+            if (max_priority is None or r.prioridade <= max_priority) and (not zonas or r.zona in zonas)
+        ]
+
+    def __len__(self) -> int:
+        return len(self.regions)
+
+
+def by_volume(regions: Iterable[Region]) -> List[Region]:
+    """Maiores primeiro: com um semáforo, é o escalonamento LPT (a maior região não fica para o fim)."""
+    return sorted(regions, key=lambda r: (-r.volume, r.slug))
+
+
+def schedule(regions: Iterable[Region], workers: int) -> List[List[Region]]:
+    """Distribui as regiões em ``workers`` grupos de volume parecido (LPT: maior região para o grupo mais leve).
+
+    Determinístico para o mesmo catálogo, então processos diferentes (shards)
+    chegam à mesma divisão sem se comunicar.
+    """
+    groups: List[List[Region]] = [[] for _ in range(max(1, workers))]
+    heap = [(0, i) for i in range(len(groups))]
+    for region in by_volume(regions):
+        load, i = heapq.heappop(heap)
+        groups[i].append(region)
+        heapq.heappush(heap, (load + max(region.volume, 1), i))
+    return groups
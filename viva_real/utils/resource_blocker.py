@@ -0,0 +1,99 @@
+import logging
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+# Só lemos texto e atributos src: os bytes dessas categorias nunca são usados
+DEFAULT_BLOCKED_TYPES = ("image", "media", "font")
+
+# Anúncios, analytics e trackers de terceiros
+DEFAULT_BLOCKED_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com", "doubleclick.net",
+    "adservice.google.com", "googleadservices.com", "facebook.net", "connect.facebook.com",
+    "hotjar.com", "clarity.ms", "nr-data.net", "newrelic.com", "criteo.com", "criteo.net",
+    "taboola.com", "outbrain.com", "tiktok.com", "bat.bing.com", "pinterest.com",
+    "linkedin.com", "amplitude.com", "segment.io", "segment.com",
+)
+
+# Tamanho médio estimado de cada tipo, para contabilizar a banda economizada
+# (requisições abortadas não chegam a informar o tamanho real)
+AVG_BYTES = {
+    "image": 80_000, "media": 500_000, "font": 40_000, "script": 60_000,
+    "stylesheet": 30_000, "xhr": 5_000, "fetch": 5_000,
+}
+
+
+def _match_domain(host: str, domains: Iterable[str]) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class ResourceBlocker:
+    """Intercepta requisições (``route``) e aborta tipos/domínios desnecessários.
+
+    ``allowed_domains`` nunca são bloqueados. Mantém contadores de requisições
+    bloqueadas, banda estimada economizada e bytes efetivamente carregados.
+    """
+
+    def __init__(
+        self,
+        blocked_types: Optional[Iterable[str]] = None,
+        blocked_domains: Optional[Iterable[str]] = None,
+        allowed_domains: Optional[Iterable[str]] = None,
+    ):
+        self.blocked_types = set(DEFAULT_BLOCKED_TYPES if blocked_types is None else blocked_types)
+        self.blocked_domains = tuple(DEFAULT_BLOCKED_DOMAINS if blocked_domains is None else blocked_domains)
+        self.allowed_domains = tuple(allowed_domains or ())
+        self.requests_allowed = 0
+        self.requests_blocked: Dict[str, int] = {}
+        self.bytes_saved_estimate = 0
+        self.bytes_loaded = 0
+
+    def _block_reason(self, url: str, resource_type: str) -> Optional[str]:
+        host = (urlparse(url).hostname or "").lower()
+        if self.allowed_domains and _match_domain(host, self.allowed_domains):
+            return None
+        if resource_type in self.blocked_types:
+            return resource_type
+        if _match_domain(host, self.blocked_domains):
+            return "terceiros"
+        return None
+
+    async def _handle(self, route) -> None:
+        request = route.request
+        reason = self._block_reason(request.url, request.resource_type)
+        if reason is None:
+            self.requests_allowed += 1
+            await route.continue_()
+            return
+        self.requests_blocked[reason] = self.requests_blocked.get(reason, 0) + 1
+        self.bytes_saved_estimate += AVG_BYTES.get(request.resource_type, 5_000)
+        await route.abort("blockedbyclient")
+
+    def _on_response(self, response) -> None:
+        try:
+            self.bytes_loaded += int(response.headers.get("content-length") or 0)
+        except (ValueError, TypeError):
+            pass
+
+    async def attach(self, target) -> None:
+        """Ativa o bloqueio num ``BrowserContext`` (ou ``Page``)."""
+        await target.route("**/*", self._handle)
+        target.on("response", self._on_response)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requisicoes_liberadas": self.requests_allowed,
+            "requisicoes_bloqueadas": sum(self.requests_blocked.values()),
+            "bloqueadas_por_tipo": dict(self.requests_blocked),
+            "bytes_economizados_estimados": self.bytes_saved_estimate,
+            "bytes_carregados": self.bytes_loaded,
+        }
+
+    def log_summary(self, label: str = "") -> None:
+        st = self.stats()
+        logger.info(
+            f"🧱 Bloqueio{f' {label}' if label else ''}: {st['requisicoes_bloqueadas']} requisições bloqueadas "
+            f"{st['bloqueadas_por_tipo']}, ~{st['bytes_economizados_estimados'] / 1e6:.1f} MB economizados, "
+            f"{st['bytes_carregados'] / 1e6:.1f} MB carregados."
+        )
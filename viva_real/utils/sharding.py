@@ -0,0 +1,161 @@
+import csv
+import hashlib
+import logging
+import os
+import shutil
+import time
+from typing import Any, Dict, List, Optional
+
+from viva_real.utils.listing_index import extract_listing_id
+
+logger = logging.getLogger(__name__)
+
+def _score(key: str, shard_index: int) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{key}|{shard_index}".encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class Shard:
+    """Fatia ``index`` de ``count`` tarefas (0-based, como ``CLOUD_RUN_TASK_INDEX``).
+
+    A posse de cada chave usa hashing de rendezvous (HRW): a chave fica com o
+    shard de maior ``hash(chave|shard)``. É determinístico em qualquer processo
+    e, ao mudar ``count``, só as chaves do shard novo/removido trocam de dono.
+    """
+
+    def __init__(self, index: int = 0, count: int = 1):
+        if count < 1 or not 0 <= index < count:
+            raise ValueError(f"Shard inválido: {index}/{count}")
+        self.index = index
+        self.count = count
+
+    @classmethod
+    def parse(cls, spec: str) -> "Shard":
+        """``"i/n"``, com ``i`` de 0 a n-1."""
+        try:
+            index, count = (int(p) for p in spec.split("/"))
+        except ValueError as e:
+            raise ValueError(f"Shard inválido: {spec!r} (use i/n, ex.: 0/4)") from e
+        return cls(index, count)
+
+    @classmethod
+    def from_env(cls) -> "Shard":
+        return cls(int(os.environ.get("CLOUD_RUN_TASK_INDEX", 0)), int(os.environ.get("CLOUD_RUN_TASK_COUNT", 1)))
+
+    @property
+    def enabled(self) -> bool:
+        return self.count > 1
+
+    @property
+    def label(self) -> str:
+        return f"shard-{self.index:02d}-de-{self.count:02d}"
+
+    def owner(self, key: str) -> int:
+        return max(range(self.count), key=lambda i: _score(key, i))
+
+    def owns(self, key: str) -> bool:
+        return self.count == 1 or self.owner(key) == self.index
+
+    def owns_listing(self, link: str) -> bool:
+        return self.owns(extract_listing_id(link) or link)
+
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+
+class ShardExchange:
+    """Troca de links e sinais de conclusão entre os shards de uma execução.
+
+    Cada shard publica os cards capturados nos seus bairros
+    (``links-<shard>.csv`` + marcador ``.ok``) e espera os dos demais para
+    montar a lista completa de links, da qual extrai só os que são seus. Com
+    bucket, os arquivos ficam em ``<remote_prefix>/`` (tarefas do Cloud Run).
+    Sem bucket, ficam em ``local_dir``, que os processos locais compartilham.
+    """
+
+    def __init__(self, shard: Shard, local_dir: str, bucket_name: Optional[str] = None, remote_prefix: Optional[str] = None):
+        self.shard = shard
+        self.local_dir = local_dir
+        self.bucket_name = bucket_name
+        self.remote_prefix = remote_prefix
+        os.makedirs(local_dir, exist_ok=True)
+
+    @property
+    def remote(self) -> bool:
+        return bool(self.bucket_name and self.remote_prefix)
+
+    def _local(self, name: str) -> str:
+        return os.path.join(self.local_dir, name)
+
+    def _put(self, name: str) -> None:
+        if self.remote:
+            from viva_real.utils.gcs import get_bucket
+            get_bucket(self.bucket_name).blob(f"{self.remote_prefix}/{name}").upload_from_filename(self._local(name))
+
+    def _fetch(self, name: str) -> bool:
+        """Garante a cópia local de ``name``; False se ainda não existe."""
+        if os.path.exists(self._local(name)):
+            return True
+        if not self.remote:
+            return False
+        from viva_real.utils.gcs import get_bucket
+        blob = get_bucket(self.bucket_name).blob(f"{self.remote_prefix}/{name}")
+        if not blob.exists():
+            return False
+        blob.download_to_filename(self._local(name))
+        return True
+
+    def put_file(self, path: str, name: str) -> None:
+        """Compartilha um arquivo qualquer (ex.: o índice do shard) com os demais."""
+        if os.path.abspath(path) != os.path.abspath(self._local(name)):
+            shutil.copyfile(path, self._local(name))
+        self._put(name)
+
+    def fetch_file(self, name: str) -> Optional[str]:
+        return self._local(name) if self._fetch(name) else None
+
+    def _label(self, index: int) -> str:
+        return Shard(index, self.shard.count).label
+
+    def _touch(self, name: str) -> None:
+        with open(self._local(name), "w", encoding="utf-8") as f:
+            f.write(time.strftime("%Y-%m-%d %H:%M:%S"))
+        self._put(name)
+
+    def publish_links(self, cards: List[Dict[str, Any]]) -> None:
+        name = f"links-{self.shard.label}.csv"
+        fields = list(dict.fromkeys(k for card in cards for k in card)) or ["link_anuncio"]
+        with open(self._local(name), "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(cards)
+        self._put(name)
+        self._touch(f"links-{self.shard.label}.ok") # Marcador só depois do CSV completo
+        logger.info(f"🧩 {self.shard.label}: {len(cards)} links publicados para os demais shards.")
+
+    def wait_for_links(self, timeout: float = 1800, poll: float = 15) -> List[Dict[str, Any]]:
+        """Cards de todos os shards que publicaram até ``timeout`` segundos (os próprios sempre entram)."""
+        deadline = time.monotonic() + timeout
+        ready: List[int] = []
+        while True:
+            ready = [i for i in range(self.shard.count) if self._fetch(f"links-{self._label(i)}.ok")]
+            if len(ready) == self.shard.count or time.monotonic() >= deadline:
+                break
+            logger.info(f"⏳ {len(ready)}/{self.shard.count} shards publicaram os links; aguardando...")
+            time.sleep(poll)
+        missing = sorted(set(range(self.shard.count)) - set(ready))
+        if missing:
+            logger.warning(f"⚠️ Shards sem links após {timeout / 60:.0f} min: {missing}. Os links deles que caberiam a este shard ficam de fora.")
+
+        cards: List[Dict[str, Any]] = []
+        for i in ready:
+            name = f"links-{self._label(i)}.csv"
+            if self._fetch(name):
+                with open(self._local(name), encoding="utf-8", newline="") as f:
+                    cards.extend(csv.DictReader(f))
+        return cards
+
+    def mark_done(self) -> None:
+        self._touch(f"fim-{self.shard.label}.ok")
+
+    def all_done(self) -> bool:
+        return all(self._fetch(f"fim-{self._label(i)}.ok") for i in range(self.shard.count))
@@ -0,0 +1,279 @@
+import asyncio
+import csv
+import logging
+import os
+import time
+from contextlib import nullcontext
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from viva_real.utils.metrics import RunMetrics
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedCsvWriter:
+    """Acumula linhas e grava no CSV em lotes, sincronizando com o GCS em segundo plano.
+
+    Cada flush acrescenta o lote ao CSV local e grava o mesmo lote num arquivo
+    de parte (``parts/<nome>.part-00001.csv``). Só as partes novas sobem para o
+    bucket, numa tarefa de fundo com cliente único, a cada ``sync_seconds`` ou
+    ``sync_parts`` partes; o arquivo completo sobe uma única vez no ``close()``.
+    ``on_flush`` recebe as linhas de cada lote depois que elas estão em disco.
+    Com ``metrics``, gravação e uploads entram nas métricas da execução.
+    """
+    always_write_parts = False
+
+    def __init__(
+        self,
+        csv_path: str,
+        fields: List[str],
+        flush_rows: int = 20,
+        flush_seconds: float = 30.0,
+        bucket_name: Optional[str] = None,
+        remote_folder: Optional[str] = None,
+        sync_seconds: float = 60.0,
+        sync_parts: int = 5,
+        on_flush: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        metrics: Optional[RunMetrics] = None,
+    ):
+        self.csv_path = csv_path
+        self.fields = fields
+        self.flush_rows = max(1, flush_rows)
+        self.flush_seconds = flush_seconds
+        self.bucket_name = bucket_name
+        self.remote_folder = remote_folder
+        self.sync_seconds = sync_seconds
+        self.sync_parts = max(1, sync_parts)
+        self.on_flush = on_flush
+        self.metrics = metrics
+
+        base, ext = os.path.splitext(os.path.basename(csv_path))
+        self.parts_dir = os.path.join(os.path.dirname(csv_path), "parts")
+        self._part_prefix = os.path.join(self.parts_dir, f"{base}.part-")
+        self._part_ext = ext or ".csv"
+        self._part_number = self._next_part_number()
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._last_flush = time.monotonic()
+        self._pending_parts: List[str] = []
+        self._pending_files: Set[str] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.rows_written = 0
+
+    @property
+    def sync_enabled(self) -> bool:
+        return bool(self.bucket_name and self.remote_folder)
+
+    def _next_part_number(self) -> int:
+        # Numa retomada, continua a numeração das partes existentes
+        if not os.path.isdir(self.parts_dir):
+            return 1
+        prefix = os.path.basename(self._part_prefix)
+        nums = [int(f[len(prefix):].split(".")[0]) for f in os.listdir(self.parts_dir) if f.startswith(prefix) and f[len(prefix):].split(".")[0].isdigit()]
+        return max(nums, default=0) + 1
+
+    def _stage(self, name: str):
+        return self.metrics.stage(name) if self.metrics is not None else nullcontext()
+
+    def write(self, row: Dict[str, Any]) -> None:
+        self._buffer.append(row)
+        if len(self._buffer) >= self.flush_rows or time.monotonic() - self._last_flush >= self.flush_seconds:
+            self.flush()
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        with open(self.csv_path, "a", newline="", encoding="utf-8-sig") as f:
+            csv.DictWriter(f, fieldnames=self.fields).writerows(rows)
+
+    def _write_part(self, rows: List[Dict[str, Any]]) -> str:
+        os.makedirs(self.parts_dir, exist_ok=True)
+        part_path = f"{self._part_prefix}{self._part_number:05d}{self._part_ext}"
+        self._part_number += 1
+        with open(part_path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.DictWriter(f, fieldnames=self.fields)
+            writer.writeheader()
+            writer.writerows(rows)
+        return part_path
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not self._buffer:
+            return
+        rows, self._buffer = self._buffer, []
+        with self._stage("gravacao"):
+            part_path = self._write_part(rows) if (self.sync_enabled or self.always_write_parts) else None
+            self._write_rows(rows)
+        self.rows_written += len(rows)
+        if self.on_flush is not None:
+            self.on_flush(rows)
+        if self.sync_enabled and part_path:
+            self._pending_parts.append(part_path)
+            if len(self._pending_parts) >= self.sync_parts and self._wake is not None:
+                self._wake.set()
+
+    def sync_file(self, path: str) -> None:
+        """Agenda o envio de um arquivo auxiliar (plano, diário) no próximo ciclo."""
+        if self.sync_enabled:
+            self._pending_files.add(path)
+
+    def _blob_name(self, path: str) -> str:
+        if os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.parts_dir):
+            return f"{self.remote_folder}/dados/parts/{os.path.basename(path)}"
+        return f"{self.remote_folder}/dados/{os.path.basename(path)}"
+
+    def _upload(self, path: str) -> None:
+        from viva_real.utils.gcs import get_bucket
+        get_bucket(self.bucket_name).blob(self._blob_name(path)).upload_from_filename(path)
+
+    async def _timed_upload(self, path: str) -> None:
+        size = os.path.getsize(path)
+        with self._stage("upload"):
+            await asyncio.to_thread(self._upload, path)
+        if self.metrics is not None:
+            self.metrics.inc("bytes", size, direcao="upload")
+
+    async def _sync_pending(self) -> None:
+        parts, self._pending_parts = self._pending_parts, []
+        files, self._pending_files = self._pending_files, set()
+        for path in parts + sorted(files):
+            if not os.path.exists(path):
+                continue
+            try:
+                await self._timed_upload(path)
+            except Exception as e:
+                logger.warning(f"Falha no upload de {os.path.basename(path)}: {e}")
+                if path in parts:
+                    self._pending_parts.append(path) # Tenta de novo no próximo ciclo
+
+    async def _sync_loop(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.sync_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            # Garante que linhas paradas no buffer também subam na cadência de tempo
+            if time.monotonic() - self._last_flush >= self.flush_seconds:
+                self.flush()
+            await self._sync_pending()
+
+    async def start(self) -> None:
+        if self.sync_enabled and self._task is None:
+            self._closing = False
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._sync_loop())
+
+    def _finalize(self) -> None:
+        """Gancho para fechar o arquivo final antes do upload."""
+
+    async def close(self) -> None:
+        self.flush()
+        with self._stage("gravacao"):
+            self._finalize()
+        if self._task is not None:
+            # Deixa o ciclo em andamento terminar para não perder partes já retiradas da fila
+            self._closing = True
+            self._wake.set()
+            await self._task
+            self._task = None
+        if self.sync_enabled:
+            await self._sync_pending()
+            try:
+                await self._timed_upload(self.csv_path)
+            except Exception as e:
+                logger.warning(f"Falha no upload final de {os.path.basename(self.csv_path)}: {e}")
+
+
+# Esquema fixo da saída colunar (campos numéricos e listas já tipados)
+PARQUET_FIELDS = [
+    ("id_anuncio", "string"), ("nome_anunciante", "string"), ("tipo_transacao", "string"),
+    ("preco_venda", "int64"), ("endereco", "string"), ("logradouro", "string"), ("numero", "string"),
+    ("bairro", "string"), ("municipio", "string"), ("uf", "string"), ("metragem", "float64"),
+    ("quartos", "int32"), ("banheiros", "int32"), ("suites", "int32"), ("vagas", "int32"),
+    ("outros", "list<string>"), ("caracteristicas", "list<string>"), ("latitude", "float64"),
+    ("longitude", "float64"), ("condominio", "int64"), ("iptu", "int64"), ("qtd_imagens", "int32"),
+    ("urls_imagens", "list<string>"), ("data_extracao", "timestamp[s]"), ("link", "string"),
+]
+
+
+def parquet_schema():
+    import pyarrow as pa
+    types = {
+        "string": pa.string(), "int64": pa.int64(), "int32": pa.int32(), "float64": pa.float64(),
+        "list<string>": pa.list_(pa.string()), "timestamp[s]": pa.timestamp("s"),
+    }
+    return pa.schema([(name, types[t]) for name, t in PARQUET_FIELDS])
+
+
+class BufferedParquetWriter(BufferedCsvWriter):
+    """Mesma mecânica de lotes, gravando Parquet tipado (``normalizar_registro``).
+
+    Cada flush vira um arquivo de parte Parquet (sempre, não só com bucket), o
+    que mantém os dados duráveis mesmo sem o rodapé do arquivo final. No
+    ``close()`` as partes são reunidas no arquivo final, uma row group por parte.
+    """
+    always_write_parts = True
+
+    def __init__(self, path: str, fields: List[str], flush_rows: int = 200, flush_seconds: float = 120.0, **kwargs):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("Saída Parquet requer pyarrow: pip install -r requirements-offline.txt") from e
+        super().__init__(path, fields, flush_rows=flush_rows, flush_seconds=flush_seconds, **kwargs)
+        self._schema = parquet_schema()
+
+    def _table(self, rows: List[Dict[str, Any]]):
+        import pyarrow as pa
+        from viva_real.utils.normalizacao import normalizar_registro
+        return pa.Table.from_pylist([normalizar_registro(r) for r in rows], schema=self._schema)
+
+    def _write_rows(self, rows: List[Dict[str, Any]]) -> None:
+        pass # O arquivo final é montado das partes no close()
+
+    def _write_part(self, rows: List[Dict[str, Any]]) -> str:
+        import pyarrow.parquet as pq
+        os.makedirs(self.parts_dir, exist_ok=True)
+        part_path = f"{self._part_prefix}{self._part_number:05d}{self._part_ext}"
+        self._part_number += 1
+        pq.write_table(self._table(rows), part_path, compression="zstd")
+        return part_path
+
+    def _previous_rows(self, part_links):
+        """Linhas do arquivo final já existente que não estão em nenhuma parte local.
+
+        Numa retomada em outro contêiner, as partes de execuções anteriores
+        podem não estar no disco (ou ter falhado no upload); sem isso, o
+        arquivo final seria sobrescrito só com as partes desta execução.
+        """
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+        if not os.path.exists(self.csv_path):
+            return None
+        try:
+            table = pq.read_table(self.csv_path, schema=self._schema)
+        except Exception as e:
+            logger.warning(f"Arquivo final {os.path.basename(self.csv_path)} ilegível, mantido como .bak: {e}")
+            os.replace(self.csv_path, f"{self.csv_path}.bak")
+            return None
+        if part_links:
+            table = table.filter(pc.invert(pc.is_in(table["link"], value_set=pa.array(sorted(part_links), pa.string()))))
+        return table if table.num_rows else None
+
+    def _finalize(self) -> None:
+        import pyarrow.parquet as pq
+        prefix = os.path.basename(self._part_prefix)
+        parts = sorted(f for f in os.listdir(self.parts_dir) if f.startswith(prefix)) if os.path.isdir(self.parts_dir) else []
+        if not parts:
+            return
+        paths = [os.path.join(self.parts_dir, name) for name in parts]
+        part_links = {link for path in paths for link in pq.read_table(path, columns=["link"]).column("link").to_pylist() if link}
+        previous = self._previous_rows(part_links)
+        tmp_path = f"{self.csv_path}.tmp"
+        with pq.ParquetWriter(tmp_path, self._schema, compression="zstd") as writer:
+            if previous is not None:
+                writer.write_table(previous)
+            for path in paths:
+                writer.write_table(pq.read_table(path, schema=self._schema))
+        os.replace(tmp_path, self.csv_path)